@@ -0,0 +1,8 @@
+"""
+Benchmarks of the workloads of the notebook IGr(3,11)_LefschetzBasis on IGr(3,2n+1) for several n.
+
+Run them from the root of the repository with
+    python -m benchmarks.run --n 4 5 6 --output results.json
+and compare with a stored baseline with
+    python -m benchmarks.run --n 4 5 6 --compare baseline.json
+"""
@@ -0,0 +1,117 @@
+"""
+Run the benchmarks of workloads.py, write the results in a JSON file and compare them with a baseline.
+
+For every benchmark and every n it records the wall time (best of the repeats), 
+the peak memory allocated during the run (tracemalloc, measured in a separate run) 
+the number of Littlewood-Richardson products computed (misses of LR_cache) and read from the cache, 
+and the number of Ext queries and of the ones computed after the canonicalization of vanishing_odd.extOddGrass_batch. 
+The caches are emptied before every run, so the numbers do not depend on the order of the benchmarks.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from src import utilities
+from src import complex as complex_module
+from src import vanishing_odd
+from src import fullness
+from benchmarks.workloads import BENCHMARKS
+
+def _cold():
+    utilities.LR_cache.clear()
+    utilities.LR_cache.reset_stats()
+    complex_module._shortest_Tor_memo.clear()
+    vanishing_odd.Ext_cache.clear()
+    vanishing_odd.Ext_cache.reset_stats()
+    fullness._staircases.clear()
+
+def measure(name: str, k: int, n: int, repeats: int = 1) -> dict:
+    """
+    Return:
+        a dictionary with the measures of the benchmark name on IGr(k,2n+1)
+    """
+    times = []
+    for _ in range(repeats):
+        _cold()
+        call = BENCHMARKS[name](k, n)
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            call()
+            times.append(time.perf_counter() - start)
+    lr = utilities.LR_cache.info()
+    ext = vanishing_odd.Ext_cache.info()
+    _cold()
+    call = BENCHMARKS[name](k, n)
+    tracemalloc.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"name": name, "k": k, "n": n, "space": f"IGr({k},{2*n+1})", "time": min(times), 
+            "peak_memory": peak, "lr_calls": lr["misses"], "lr_hits": lr["hits"], 
+            "ext_queries": ext["queries"], "ext_computed": ext["computed"], "ext_dedup_ratio": ext["dedup_ratio"]}
+
+def environment() -> dict:
+    return {"python": platform.python_version(), "numpy": np.__version__, "platform": platform.platform(), 
+            "LR_backend": utilities.LR_backend}
+
+def compare(results: list, baseline: list, threshold: float) -> list:
+    """
+    print the ratios time / baseline time and the memory ratios
+
+    Return:
+        the benchmarks slower than threshold times the baseline
+    """
+    stored = {(r["name"], r["k"], r["n"]): r for r in baseline}
+    regressions = []
+    print(f"{'benchmark':<24}{'space':<12}{'time':>10}{'baseline':>10}{'ratio':>8}{'memory':>8}{'LR calls':>10}")
+    for result in results:
+        old = stored.get((result["name"], result["k"], result["n"]))
+        if old is None:
+            continue
+        ratio = result["time"] / old["time"] if old["time"] > 0 else float("inf")
+        memory = result["peak_memory"] / old["peak_memory"] if old["peak_memory"] > 0 else float("inf")
+        flag = " <-- slower" if ratio > threshold else ""
+        print(f"{result['name']:<24}{result['space']:<12}{result['time']:>10.3f}{old['time']:>10.3f}{ratio:>8.2f}{memory:>8.2f}"
+              f"{result['lr_calls'] - old['lr_calls']:>+10}{flag}")
+        if ratio > threshold:
+            regressions.append(result)
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks of the notebook workloads on IGr(3,2n+1)")
+    parser.add_argument("--n", type=int, nargs="+", default=[4, 5, 6], help="values of n, IGr(3,2n+1)")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS), help="benchmarks to run")
+    parser.add_argument("--repeats", type=int, default=1, help="timed runs, the best one is kept")
+    parser.add_argument("--output", help="JSON file for the results")
+    parser.add_argument("--compare", help="JSON file of a baseline to compare with")
+    parser.add_argument("--threshold", type=float, default=1.2, help="time ratio above which a benchmark is a regression")
+    args = parser.parse_args(argv)
+    k = 3
+    results = []
+    for n in args.n:
+        for name in args.only:
+            result = measure(name, k, n, args.repeats)
+            results.append(result)
+            print(f"{name:<24}{result['space']:<12}{result['time']:>10.3f} s{result['peak_memory']/2**20:>10.1f} MiB"
+                  f"{result['lr_calls']:>8} LR{result['ext_queries']:>8} Ext{result['ext_computed']:>8} computed", flush=True)
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump({"environment": environment(), "results": results}, f, indent=1)
+    if args.compare is not None:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        if len(compare(results, baseline, args.threshold)) != 0:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
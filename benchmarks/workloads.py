@@ -0,0 +1,91 @@
+"""
+The notebook steps as benchmarks parameterized by n, on IGr(3,2n+1).
+
+For n=5 the weights are the ones of the notebook: the basis B, the staircases of [4,0,0], [3,0,-1], [2,0,-2] 
+truncated at 5, 4, 3, their cone H, the twist families used with is_indep. For other n the same patterns are extended, 
+the results are not meant to be Lefschetz bases, only comparable workloads of increasing size.
+
+Each benchmark is a function (k, n) -> callable, the setup is done before the callable is timed.
+"""
+
+import numpy as np
+
+from src.vanishing_odd import is_Lefschetz_basis, Lefschetz_basis_report
+from src.complex import staircase
+from src.fullness import fullness_test
+from src.fullness_bitmask import fullness_test_bitmask
+
+def basis(n: int) -> list:
+    """
+    the weights (a,0,-b) with a+b <= n-2, (a,0,-b) with a+b = n-1, a >= 2, b >= 1 and (n-1,0,0): B of the notebook for n=5
+    """
+    weights = [[a, 0, -b] for a in range(n-1) for b in range(n-1-a)][::-1]
+    weights += [[a, 0, -(n-1-a)] for a in range(2, n-1)]
+    return sorted(weights, key=lambda w: (w[0], w[2])) + [[n-1, 0, 0]]
+
+def twisted_basis(k: int, n: int) -> list:
+    return [list(np.array(b) + i) for i in range(2*n+2-k) for b in basis(n)]
+
+def splits(k: int, n: int) -> list:
+    """
+    the truncated staircases of [n-1-j,0,-j] for j=0,1,2, as split40, split31, split22 in the notebook
+    """
+    return [staircase([n-1-j, 0, -j], k, 2*n+1).stupid_truncation(n-j) for j in range(3)]
+
+def cone(k: int, n: int):
+    """
+    H = split22.cone(split31.cone(split40)) of the notebook
+    """
+    split40, split31, split22 = splits(k, n)
+    return split22.cone(split31.cone(split40))
+
+def mutations(n: int) -> list:
+    """
+    the twist families checked with is_indep: [a,0,-j] for a < n-1-j
+    """
+    return [[[a, 0, -j] for a in range(n-2-j, -1, -1)] for j in range(3)]
+
+def bench_Lefschetz_basis(k, n):
+    B = basis(n)
+    return lambda: is_Lefschetz_basis(B, k, n)
+
+def bench_Lefschetz_report(k, n):
+    Btwists = twisted_basis(k, n)
+    return lambda: Lefschetz_basis_report(Btwists, k, n)
+
+def bench_staircase_truncation(k, n):
+    return lambda: splits(k, n)
+
+def bench_is_indep(k, n):
+    split = splits(k, n)
+    families = mutations(n)
+    B = basis(n)
+    # the twists of B by 2n+1-k,...,0, checked against the splits and their cone as in the notebook
+    Btwists = [[np.array(b) + i for b in B] for i in range(2*n+1-k, -1, -1)]
+    complexes = split + [cone(k, n)]
+    return lambda: ([cpx.is_indep(family, k, n) for cpx, family in zip(split, families)] 
+                    + [cpx.is_indep(Btwist, k, n) for cpx in complexes for Btwist in Btwists])
+
+def bench_shortest_Tor(k, n):
+    split = splits(k, n)
+    pairs = [(a, b.dual()) for a in split for b in split if a is not b]
+    return lambda: [a.shortest_Tor(b, k, n) for a, b in pairs]
+
+def bench_fullness(k, n):
+    Btwists = twisted_basis(k, n)
+    return lambda: fullness_test(Btwists, k, n)
+
+def bench_fullness_bitmask(k, n):
+    Btwists = twisted_basis(k, n)
+    return lambda: fullness_test_bitmask(Btwists, k, n)
+
+#name: benchmark
+BENCHMARKS = {
+    "is_Lefschetz_basis": bench_Lefschetz_basis,
+    "Lefschetz_basis_report": bench_Lefschetz_report,
+    "staircase_truncation": bench_staircase_truncation,
+    "is_indep": bench_is_indep,
+    "shortest_Tor": bench_shortest_Tor,
+    "fullness_test": bench_fullness,
+    "fullness_test_bitmask": bench_fullness_bitmask,
+}
@@ -3,18 +3,26 @@ This module contains the definitions of the following:
 
 Objects:
     complex_entry: a Counter {weight:multiplicity}, where weight is  a tuple of decreasing integers
+    packed_entry: an array-backed complex_entry, with weights and multiplicities stored in integer arrays
     complex: a dictionary {degree: complex_entry}
     truncated_complex: a pair of complexes that represent an object obtained performing a stupid truncation
 
 Functions:
     staircase: the most relevant way to initialize a complex
+    staircase_weights, staircase_terms: the terms of a staircase complex, one degree at a time
+    fused_tensor: non-acyclic part of a tensor product, filtered while it is computed
+    iter_streaming_tensor: the same, degree by degree, for a first factor given as a stream of terms
 """
 
-from src.utilities import LRfactors, formatting
-from src.vanishing_odd import vanishingOddGrass
-from collections import defaultdict, Counter
+from src.utilities import LRfactors, LRfactors_batch
+from src.weight import Weight
+from src.vanishing_odd import vanishingOddGrass_batch
+from src.instrument import instrumented
+from collections import defaultdict, Counter, OrderedDict
+from typing import Tuple
 
 import numpy as np
+import itertools
 import math
 
 class complex:
@@ -46,7 +54,7 @@ class complex:
                             We avoid printing empty entries, except when the complex is trivial 
                             or the empty entry is between non-empty entries
         """
-        nonzero = [deg for deg, entry in self.degrees.items() if len(entry.summands)!=0]
+        nonzero = [deg for deg, entry in self.degrees.items() if len(entry)!=0]
         #if the complex is all 0
         if len(nonzero)==0:
             return "0"
@@ -91,7 +99,7 @@ class complex:
             amp: max degree with nonzero entry - min degree with nonzero entry. If complex is zero, amp = 0.  
                 If amp = 0, 1, it coincides with the true amplitude in cohomology.
         """
-        nonzero = [i for i in self.degrees if len(self.degrees[i].summands)!=0]
+        nonzero = [i for i in self.degrees if len(self.degrees[i])!=0]
         #if the complex is all 0
         if len(nonzero) == 0:
             amp = 0 
@@ -140,6 +148,12 @@ class complex:
         """
         return self + second_term.shift(1)
 
+    def packed(self):
+        """
+        same complex with entries stored as packed_entry objects
+        """
+        return complex({deg: packed_entry.from_entry(entry) for deg, entry in self.degrees.items()})
+
 class complex_entry:
     """
     This class represents a entry in a complex of the form \Sum mult * U^{weight} -  all in the same degree. 
@@ -169,20 +183,28 @@ class complex_entry:
         else:
             output = " 0 " 
         return output
+
+    def __len__(self) -> int:
+        return len(self.summands)
     
     def __add__(self, second_term):
         """
         sum of entries. We sum multiplicites on common terms. If a term appears in only one complex_entry, 
         the multiplicity is unchanged
         """
+        if isinstance(second_term, packed_entry):
+            return second_term + self
         #+ is the + of Counter objects, which sums multiplicities and creates new entries
         total = self.summands + second_term.summands    
         return complex_entry(total)
         
+    @instrumented()
     def __mul__(self, second_term):
         """
         tensor product of entries. We apply distributivity, while the multiplication of single weights is implemented in LRfactors
         """
+        if isinstance(second_term, packed_entry):
+            return packed_entry.from_entry(self) * second_term
         partial_sum = complex_entry({})
         for i in self.summands.keys():
             for j in second_term.summands.keys():
@@ -202,11 +224,130 @@ class complex_entry:
     
     def non_vanish_terms(self,k,n):
         """
-        extract the terms of the sum which have nonzero cohomology iterating vanishingOddGrass
+        extract the terms of the sum which have nonzero cohomology, filtering the whole entry with vanishingOddGrass_batch
         """
-        nonvanish = { weight: multip for weight, multip in self.summands.items() if (not vanishingOddGrass(weight, k,n)[0])}
+        weights = list(self.summands.keys())
+        vanish = vanishingOddGrass_batch(weights, k, n)
+        nonvanish = {weight: self.summands[weight] for weight, weight_vanish in zip(weights, vanish) if not weight_vanish}
         return complex_entry(nonvanish)
     
+class packed_entry:
+    """
+    Array-backed alternative to complex_entry, for entries with many summands: the weights are the rows of an 
+    integer array, with a parallel array of multiplicities, and all operations act on the whole arrays. 
+    It can be used in a complex in place of complex_entry (see complex.packed).
+
+    Attributes: 
+        weights: an (N, k) integer array, each row a weight, without repetitions
+        multiplicities: an integer array of length N of positive multiplicities
+    """
+    def __init__(self, weights = None, multiplicities = None, k: int = 0) -> None:
+        """
+        Constructor for the packed_entry class. Repeated weights are merged summing multiplicities and 
+        weights with non-positive multiplicities are dropped.
+
+        Args:
+            weights: an (N, k) integer array, or a list of weights of the same length
+            multiplicities: an integer array of length N, default all 1
+            k: length of the weights, only needed if there are no weights
+        """
+        weights = np.zeros((0, k), dtype=np.int64) if weights is None else np.asarray(weights, dtype=np.int64)
+        weights = weights.reshape(len(weights), -1) if weights.size else weights.reshape(len(weights), k)
+        if multiplicities is None:
+            multiplicities = np.ones(len(weights), dtype=np.int64)
+        multiplicities = np.asarray(multiplicities, dtype=np.int64)
+        if len(weights) > 0:
+            weights, inverse = np.unique(weights, axis=0, return_inverse=True)
+            merged = np.zeros(len(weights), dtype=np.int64)
+            np.add.at(merged, inverse.ravel(), multiplicities)
+            positive = merged > 0
+            weights, multiplicities = weights[positive], merged[positive]
+        self.weights = weights
+        self.multiplicities = multiplicities
+
+    @classmethod
+    def from_entry(cls, entry):
+        """
+        packed version of a complex_entry (a packed_entry is returned unchanged)
+        """
+        if isinstance(entry, packed_entry):
+            return entry
+        summands = entry.summands
+        if len(summands) == 0:
+            return cls()
+        return cls(np.array(list(summands.keys()), dtype=np.int64), list(summands.values()))
+
+    @property
+    def summands(self) -> Counter:
+        """
+        the entry as a Counter {weight: multiplicity}, as in complex_entry
+        """
+        return Counter({tuple(int(i) for i in weight): int(multip) for weight, multip in zip(self.weights, self.multiplicities)})
+
+    def to_entry(self) -> complex_entry:
+        return complex_entry(self.summands)
+
+    def __len__(self) -> int:
+        return len(self.weights)
+
+    def __str__(self) -> str:
+        return str(self.to_entry())
+
+    def __add__(self, second_term):
+        """
+        sum of entries, concatenating the arrays and merging repeated weights
+        """
+        second_term = packed_entry.from_entry(second_term)
+        if len(second_term) == 0:
+            return self
+        if len(self) == 0:
+            return second_term
+        return packed_entry(np.concatenate([self.weights, second_term.weights]), 
+                            np.concatenate([self.multiplicities, second_term.multiplicities]))
+
+    def scale(self, multiplier: int):
+        """
+        multiplication by a positive integer, i.e. sum of multiplier copies of the entry
+        """
+        return packed_entry(self.weights, self.multiplicities * multiplier, self.weights.shape[1])
+
+    @instrumented()
+    def __mul__(self, second_term):
+        """
+        tensor product of entries if second_term is an entry, multiplication by a scalar if it is an integer.
+        The LR products of all pairs of summands are computed with a single call of LRfactors_batch.
+        """
+        if isinstance(second_term, (int, np.integer)):
+            return self.scale(second_term)
+        second_term = packed_entry.from_entry(second_term)
+        k = max(self.weights.shape[1], second_term.weights.shape[1])
+        if len(self) == 0 or len(second_term) == 0:
+            return packed_entry(k=k)
+        pairs = [(i, j) for i in self.weights for j in second_term.weights]
+        multips = np.outer(self.multiplicities, second_term.multiplicities).ravel()
+        weights, multiplicities = [], []
+        for multip, product in zip(multips, LRfactors_batch(pairs, k)):
+            weights += list(product.keys())
+            multiplicities += [c * multip for c in product.values()]
+        return packed_entry(np.array(weights, dtype=np.int64).reshape(-1, k), np.array(multiplicities, dtype=np.int64), k)
+
+    __rmul__ = __mul__
+
+    def dual(self):
+        """
+        dual entry. Every weight is replaced with the dual one, multiplicities unchanged.
+        """
+        return packed_entry(-self.weights[:, ::-1], self.multiplicities, self.weights.shape[1])
+
+    def non_vanish_terms(self, k, n):
+        """
+        extract the terms of the sum which have nonzero cohomology with a single call of vanishingOddGrass_batch
+        """
+        if len(self) == 0:
+            return self
+        vanish = vanishingOddGrass_batch(self.weights, k, n)
+        return packed_entry(self.weights[~vanish], self.multiplicities[~vanish], k)
+
 class truncated_complex:
     """
     truncated complex is made to store the result of a stupid_truncation, where we obtain a object with 2 
@@ -244,73 +385,330 @@ class truncated_complex:
         cone of the objects obtained as truncation of cones
         """
         return truncated_complex(self.right.cone(second_trunc_cpx.right), self.left.cone(second_trunc_cpx.left))
+
+    def packed(self):
+        """
+        same truncated complex with entries stored as packed_entry objects
+        """
+        return truncated_complex(self.right.packed(), self.left.packed())
     
-    def is_indep(self,   weights:list, k:int, n:int, verbose=False):
+    def iter_problems(self, weights:list, k:int, n:int):
         """
-        does the object T described by the truncated complex form an exact sequence with T, weights on IGr(k,2n+1)?
+        yield the weights of is_indep with a nonzero Ext, as soon as they are found
 
         Args:
             weights: a list of tuples
             k, n: data fixing the isotropic grassmannian IGr(k, 2n+1)
-            verbose: if we want the list of weights with a nonzero Ext
+        Yields:
+            records: dictionaries {"weight": weight, "cohomology": the non-acyclic complex found by shortest_Tor}
         """
-        problem_weights={}
         for i in weights:
             cpx = complex({0: complex_entry({tuple(i):1})})
             # this is a bit artificial
             trunc_cpx = truncated_complex(cpx, cpx)
             # if a complex .amplitude() is zero, then it must be zero (the opposite is not true and requires further study)
-            if trunc_cpx.dual().shortest_Tor(self,k,n).amplitude() != 0:
-                problem_weights.update({tuple(i):trunc_cpx.dual().shortest_Tor(self,k,n)})
-        if verbose:
-            if len(problem_weights) != 0:
-                for weight, cohom in problem_weights.items():
-                    print(f"{weight}:\n {str(cohom)}, \n")
-        return len(problem_weights) == 0
+            cohom = trunc_cpx.dual().shortest_Tor(self,k,n)
+            if cohom.amplitude() != 0:
+                yield {"weight": tuple(i), "cohomology": cohom}
+
+    def is_indep(self,   weights:list, k:int, n:int, verbose=False):
+        """
+        does the object T described by the truncated complex form an exact sequence with T, weights on IGr(k,2n+1)?
+
+        Args:
+            weights: a list of tuples
+            k, n: data fixing the isotropic grassmannian IGr(k, 2n+1)
+            verbose: if we want the list of weights with a nonzero Ext, otherwise it stops at the first one
+        """
+        if not verbose:
+            return next(self.iter_problems(weights, k, n), None) is None
+        problems = list(self.iter_problems(weights, k, n))
+        for problem in problems:
+            print(f"{problem['weight']}:\n {str(problem['cohomology'])}, \n")
+        return len(problems) == 0
 
-    def shortest_Tor(self, second_trunc_cpx, k,n):
+    def indep_matrix(self, weights:list, twists:list, k:int, n:int) -> np.array:
+        """
+        is_indep for all the twists of a list of weights at once. Twisting a weight shifts every summand of its products 
+        with the two resolutions, so these products are computed once per weight and the vanishing of all their twists 
+        is checked in a single vanishingOddGrass_batch call. As in is_indep, a pair is independent if the non-acyclic part 
+        of one of the products is zero.
+
+        Args:
+            weights: a list of weights
+            twists: a list of integers
+            k, n: data fixing the isotropic grassmannian IGr(k, 2n+1)
+        Return:
+            indep: a boolean array of shape (len(weights), len(twists)), True at (i, j) if 
+                is_indep([weights[i] + twists[j]], k, n) is True
+        """
+        twists = np.array(list(twists), dtype=int)
+        indep = np.zeros((len(weights), len(twists)), dtype=bool)
+        resolutions = [[(weight, multip) for entry in resol.degrees.values() for weight, multip in entry.summands.items()] 
+                       for resol in (self.left, self.right)]
+        for row, weight in enumerate(weights):
+            dual_weight = Weight(weight, k).dual
+            for summands in resolutions:
+                products = LRfactors_batch([(dual_weight, summand) for summand, _ in summands], k)
+                product_weights = np.array([w for product in products for w in product], dtype=int).reshape(-1, k)
+                shifted = product_weights[np.newaxis, :, :] - twists.reshape(-1, 1, 1)
+                vanish = vanishingOddGrass_batch(shifted.reshape(-1, k), k, n).reshape(len(twists), -1)
+                indep[row] |= np.all(vanish, axis=1)
+        return indep
+
+    @instrumented()
+    def shortest_Tor(self, second_trunc_cpx, k,n, lazy=True):
         """
         Given two truncated complexes, we determine which derived tensor product, 
         which can be computed in 2*2 ways with the adequate spectral sequence, 
         has the smallest amplitude of the non-acyclic part. 
+        Results are memoized on the content of the two truncated complexes, 
+        every call returns a new complex that the caller can modify.
 
         Args: 
             k, n: data fixing the isotropic grassmannian IGr(k, 2n+1)
+            lazy: evaluate the candidates degree by degree in turn, dropping a candidate as soon as the degrees seen so far 
+                give it an amplitude that cannot beat the best complete one, and stopping at the first zero candidate. 
+                If False, all four candidates are computed completely.
         Return: 
             the non-acyclic part with smallest amplitude
         """
-        mixed_prods = [] 
-        mixed_prods.append(self.left * second_trunc_cpx.left)
-        mixed_prods.append(self.left * second_trunc_cpx.right)
-        mixed_prods.append(self.right * second_trunc_cpx.left)
-        mixed_prods.append(self.right * second_trunc_cpx.right)
-        mixed_cohom = [i.non_vanish_terms(k,n) for i in mixed_prods]
-        min_cohom = np.argmin([i.amplitude() for i in mixed_cohom])
-        return mixed_cohom[min_cohom]
+        key = (self._key(), second_trunc_cpx._key(), k, n)
+        if key in _shortest_Tor_memo:
+            _shortest_Tor_memo.move_to_end(key)
+            return _thaw(_shortest_Tor_memo[key])
+        mixed_pairs = [(self.left, second_trunc_cpx.left), (self.left, second_trunc_cpx.right), 
+                       (self.right, second_trunc_cpx.left), (self.right, second_trunc_cpx.right)]
+        if lazy:
+            shortest = _branch_and_bound_Tor(mixed_pairs, k, n)
+        else:
+            # each candidate is filtered while it is computed, see fused_tensor
+            mixed_cohom = [fused_tensor(first, second, k, n) for first, second in mixed_pairs]
+            min_cohom = np.argmin([amplitude for _, amplitude in mixed_cohom])
+            shortest = mixed_cohom[min_cohom][0]
+        _shortest_Tor_memo[key] = _freeze(shortest)
+        if len(_shortest_Tor_memo) > SHORTEST_TOR_MEMO_SIZE:
+            _shortest_Tor_memo.popitem(last=False)
+        return shortest
+
+    def _key(self) -> tuple:
+        """
+        hashable description of the content of the truncated complex
+        """
+        return (_complex_key(self.right), _complex_key(self.left))
+
+#memo of truncated_complex.shortest_Tor, with LRU eviction. The complexes are stored frozen (see _freeze)
+SHORTEST_TOR_MEMO_SIZE = 4096
+_shortest_Tor_memo = OrderedDict()
+
+def _freeze(cpx: complex) -> tuple:
+    """
+    immutable copy of a complex, keeping the order of the degrees and of the summands
+    """
+    return tuple((deg, tuple(entry.summands.items())) for deg, entry in cpx.degrees.items())
+
+def _thaw(frozen: tuple) -> complex:
+    """
+    new complex with the content of a frozen one
+    """
+    return complex({deg: complex_entry(dict(summands)) for deg, summands in frozen})
+
+def _complex_key(cpx: complex) -> tuple:
+    return tuple(sorted((deg, tuple(sorted((tuple(int(i) for i in weight), int(multip)) 
+                                           for weight, multip in entry.summands.items())))
+                        for deg, entry in cpx.degrees.items() if len(entry) != 0))
+
+def _branch_and_bound_Tor(mixed_pairs: list, k: int, n: int) -> complex:
+    """
+    lazy evaluation of the candidates of shortest_Tor. Every candidate is advanced one degree at a time in turn; 
+    since degrees come in increasing order, max - min + 1 over the non-zero degrees seen so far is a lower bound 
+    for its amplitude. A candidate is dropped when this bound cannot beat the best complete candidate 
+    (ties go to the first candidate, as with np.argmin), and everything stops when a candidate is zero.
+    """
+    verdicts = {}
+    generators = {index: iter_fused_tensor(first, second, k, n, verdicts) for index, (first, second) in enumerate(mixed_pairs)}
+    partial = {index: complex() for index in generators}
+    nonzero = {index: [] for index in generators}
+    best = None
+    def bound(index):
+        return 0 if len(nonzero[index]) == 0 else nonzero[index][1] + 1 - nonzero[index][0]
+    def beaten(index):
+        return best is not None and (bound(index), index) >= (bound(best), best)
+    while len(generators) != 0:
+        for index in list(generators):
+            if beaten(index):
+                del generators[index]
+                continue
+            step = next(generators[index], None)
+            if step is None:
+                del generators[index]
+                best = index
+                if bound(index) == 0:
+                    return partial[index]
+                continue
+            degree, entry = step
+            if len(entry) != 0:
+                partial[index].degrees[degree] = entry
+                nonzero[index] = [nonzero[index][0] if nonzero[index] else degree, degree]
+    return partial[best]
+
+@instrumented()
+def iter_fused_tensor(first: complex, second: complex, k: int, n: int, verdicts: dict = None):
+    """
+    non-acyclic part of the tensor product first * second, produced degree by degree (increasing). 
+    Acyclic summands are discarded as soon as the LR expansion of a pair of entries produces them, 
+    so only the non-acyclic part of the current degree is stored.
+
+    Args:
+        first, second: two complexes
+        k, n: data fixing the isotropic grassmannian IGr(k, 2n+1)
+        verdicts: optional dictionary {weight: acyclic?} shared between calls, to check every weight once
+    Yields:
+        pairs (degree, complex_entry) with the non-acyclic summands of the product in that degree
+    """
+    if verdicts is None:
+        verdicts = {}
+    pairs_by_degree = defaultdict(list)
+    for i in first.degrees.keys():
+        for j in second.degrees.keys():
+            pairs_by_degree[i+j].append((first.degrees[i], second.degrees[j]))
+    for degree in sorted(pairs_by_degree):
+        yield degree, complex_entry(_nonvanish_products(pairs_by_degree[degree], k, n, verdicts))
+
+def iter_streaming_tensor(first_terms, second: complex, k: int, n: int, verdicts: dict = None, chunk_size: int = None):
+    """
+    iter_fused_tensor for a first factor given as a stream of terms, for instance staircase_terms, 
+    so that the first complex is never stored: a term of degree d is kept only while the output degrees 
+    d + (degrees of second) are not complete, and it is dropped afterwards.
+
+    Args:
+        first_terms: an iterable of pairs (degree, complex_entry) by increasing degree
+        second: a complex
+        k, n: data fixing the isotropic grassmannian IGr(k, 2n+1)
+        verdicts: optional dictionary {weight: acyclic?} shared between calls, to check every weight once
+        chunk_size: maximal number of pairs of summands whose LR products are in memory at once, default TENSOR_CHUNK_SIZE
+    Yields:
+        pairs (degree, complex_entry) with the non-acyclic summands of the product in that degree, as iter_fused_tensor
+    """
+    if verdicts is None:
+        verdicts = {}
+    second_degrees = sorted(deg for deg, entry in second.degrees.items() if len(entry) != 0)
+    if len(second_degrees) == 0:
+        return
+    low, high = second_degrees[0], second_degrees[-1]
+    window = []
+    next_degree = None
+
+    def complete(last_degree):
+        # yield the output degrees up to last_degree, dropping the terms that cannot contribute to the next ones
+        nonlocal window, next_degree
+        while next_degree is not None and next_degree <= last_degree and len(window) != 0:
+            entry_pairs = [(entry, second.degrees[next_degree - deg]) for deg, entry in window 
+                           if next_degree - deg in second.degrees and len(second.degrees[next_degree - deg]) != 0]
+            if len(entry_pairs) != 0:
+                yield next_degree, complex_entry(_nonvanish_products(entry_pairs, k, n, verdicts, chunk_size))
+            next_degree += 1
+            window = [(deg, entry) for deg, entry in window if deg + high >= next_degree]
+
+    previous = None
+    for degree, entry in first_terms:
+        if previous is not None and degree <= previous:
+            raise Exception("The terms should be given by increasing degree")
+        previous = degree
+        if len(entry) == 0:
+            continue
+        yield from complete(degree + low - 1)
+        if next_degree is None or len(window) == 0:
+            next_degree = degree + low
+        window.append((degree, entry))
+    if len(window) != 0:
+        yield from complete(window[-1][0] + high)
+
+#maximal number of pairs of summands whose LR products are computed at once by the tensor products
+TENSOR_CHUNK_SIZE = 4096
+
+def _nonvanish_products(entry_pairs: list, k: int, n: int, verdicts: dict, chunk_size: int = None) -> Counter:
+    """
+    non-acyclic summands of the sum of the products first_entry * second_entry over entry_pairs. 
+    The LR products are computed by chunks of at most chunk_size pairs of summands (default TENSOR_CHUNK_SIZE) 
+    and the acyclic summands are discarded chunk by chunk.
+    """
+    if chunk_size is None:
+        chunk_size = TENSOR_CHUNK_SIZE
+    nonvanish = Counter()
+    for first_entry, second_entry in entry_pairs:
+        first_summands, second_summands = first_entry.summands, second_entry.summands
+        pairs = ((i, j) for i in first_summands for j in second_summands)
+        while True:
+            chunk = list(itertools.islice(pairs, chunk_size))
+            if len(chunk) == 0:
+                break
+            products = LRfactors_batch(chunk, k)
+            new_weights = list({w for product in products for w in product if w not in verdicts})
+            verdicts.update(zip(new_weights, vanishingOddGrass_batch(new_weights, k, n)))
+            for (i, j), product in zip(chunk, products):
+                for weight, multip in product.items():
+                    if not verdicts[weight]:
+                        nonvanish[weight] += multip * first_summands[i] * second_summands[j]
+    return nonvanish
+
+def fused_tensor(first: complex, second: complex, k: int, n: int) -> Tuple[complex, int]:
+    """
+    (first * second).non_vanish_terms(k, n) computed with iter_fused_tensor, 
+    keeping track of the range of degrees with non-acyclic terms.
+
+    Return:
+        nonvanish_cohoms: the non-acyclic part of the tensor product 
+        amplitude: its naive amplitude, as in complex.amplitude
+    """
+    nonvanish_cohoms = complex()
+    nonzero = []
+    for degree, entry in iter_fused_tensor(first, second, k, n):
+        if len(entry) != 0:
+            nonvanish_cohoms.degrees[degree] = entry
+            nonzero = [nonzero[0] if nonzero else degree, degree]
+    amplitude = 0 if len(nonzero) == 0 else nonzero[1] + 1 - nonzero[0]
+    return nonvanish_cohoms, amplitude
+
+def staircase_weights(weight, k, m):
+    """
+    Given a weight of length k, satisfying weight[0]-weight[-1] <= m-k, this yields the terms of the associate 
+    staircase complex in the Grassmannian Gr(k, m), one degree at a time, without building the complex. 
+    The term in degree m+1-k-i is obtained removing i boxes from the first row: with x = weight[0]-i and 
+    j the number of rows r >= 2 with weight[r] > x, it is U^{weight[1]-1, ..., weight[j]-1, x, weight[j+1], ..., weight[k-1]} 
+    with multiplicity binomial(m, i+j).
+
+    Args: 
+        weight: a decreasing list-like of at most k integers
+        k, m: data fixing the grassmannian Gr(k, m)
+    Yields:
+        triples (degree, weight as a tuple, multiplicity), by increasing degree 0, ..., m+1-k
+    """
+    weight = Weight(weight, k).entries
+    if weight[0]-weight[-1] > m-k:
+        raise Exception("staircase is defined only if weight[0]-weight[-1] is small enough")
+    for i in range(m+1-k, -1, -1):
+        x = weight[0] - i
+        j = sum(1 for entry in weight[1:] if entry > x)
+        yield m+1-k-i, tuple(entry - 1 for entry in weight[1:j+1]) + (x,) + weight[j+1:], math.comb(m, i+j)
+
+def staircase_terms(weight, k, m):
+    """
+    the terms of staircase_weights as pairs (degree, complex_entry), by increasing degree, 
+    for instance the first factor of iter_streaming_tensor
+    """
+    for degree, term, multip in staircase_weights(weight, k, m):
+        yield degree, complex_entry({term: multip})
 
 def staircase(weight, k, m) -> complex:
     """
-    Given a weight of length 3, satisfying weight[0]-weight[2] <= n-k, this returns the associate staircase complex 
-    in the Grassmannian Gr(3, m).
+    Given a weight of length k, satisfying weight[0]-weight[-1] <= m-k, this returns the associate staircase complex 
+    in the Grassmannian Gr(k, m), with the terms of staircase_terms.
 
     Args: 
         k, m: data fixing the grassmannian Gr(k, m)
     Return:
         the staicase complex as in Fonarev's work.
     """
-    if k!= 3:
-        raise Exception("k != 3 not implemented yet")
-    # TODO: add k!=3
-    weight =formatting(weight, k)
-    if weight[0]-weight[-1] > m-k:
-        raise Exception("staircase is defined only if weight[0]-weight[-1] is small enough")
-    stairs = {}
-    for i in range(m+2-k):
-        if weight[0] - i >=  weight[1]:
-            stairs.update({m+1-k-i: complex_entry({tuple([weight[0] - i, weight[1], weight[2]]): math.comb(m,i) })})
-        elif weight[0] - i >=  weight[2]:
-            stairs.update({m+1-k-i: complex_entry({tuple([weight[1] - 1, weight[0]-i, weight[2]]): math.comb(m,i+1) })})
-        else:
-            stairs.update({m+1-k-i: complex_entry({tuple([weight[1] - 1, weight[2]-1, weight[0]-i]): math.comb(m, i+2)})})
-    final = complex(stairs)
-    return final
+    terms = list(staircase_terms(weight, k, m))
+    return complex(dict(terms[::-1]))
@@ -0,0 +1,147 @@
+"""
+Euler characteristics on IGr(k,2n+1), a necessary condition for the vanishing of Ext that is cheap to evaluate.
+
+chi(U^weight) on the even Grassmannian IGr(k,2n+2) is given by Borel-Weil-Bott: it is zero if weight + rho has a zero entry 
+or two entries with the same absolute value, otherwise it is det(w) times the dimension (Weyl dimension formula of type C_{n+1}) 
+of the representation with highest weight w(weight + rho) - rho, where w is the signed permutation making weight + rho dominant. 
+On IGr(k,2n+1) it is the alternating sum over the Koszul resolution used in vanishing_odd, 
+and chi(U^alpha(l), U^beta) is obtained from the LR summands of (-alpha)^rev x beta as in extOddGrass_twists.
+
+For a Lefschetz basis E_1, ..., E_N the full collection E_1, ..., E_N, E_1(1), ..., E_N(w) is exceptional, 
+so its Gram matrix chi(F_a, F_b) is upper unitriangular.
+"""
+
+import numpy as np
+from typing import Tuple
+
+from src.utilities import weight_array, LRfactors
+from src.weight import Weight
+from src.vanishing_odd import _wedge_resolution
+
+def eulerEvenGrass_batch(weights: np.array, k: int, n: int) -> np.array:
+    """
+        Euler characteristic of U^weight on the isotropic Grassmannian of type C_n, for many weights at once.
+
+        Args:
+            weights: an (N, l) integer array (or a list of N weights of the same length l <= n)
+            k, n: as in vanishingEvenGrass
+        Returns:
+            chi: an object array of N Python integers
+    """
+    weights = np.asarray(weights, dtype=int)
+    chi = np.zeros(len(weights), dtype=object)
+    if weights.size == 0:
+        return chi
+    padded = np.zeros((weights.shape[0], n), dtype=int)
+    padded[:, :weights.shape[1]] = weights
+    w = padded + np.arange(n, 0, -1)
+    abs_w = np.abs(w)
+    order = np.argsort(-abs_w, axis=1, kind="stable")
+    v = np.take_along_axis(abs_w, order, axis=1)
+    regular = (v[:, -1] != 0) & np.all(v[:, 1:] != v[:, :-1], axis=1)
+    if not np.any(regular):
+        return chi
+    v, w, order = v[regular], w[regular], order[regular]
+    # det(w) = (-1)^(number of negative entries) * sign of the sorting permutation
+    inversions = np.sum(np.triu(order[:, :, np.newaxis] > order[:, np.newaxis, :], 1), axis=(1, 2))
+    sign = np.where((np.sum(w < 0, axis=1) + inversions) % 2 == 0, 1, -1)
+    i, j = np.triu_indices(n, 1)
+    factors = np.concatenate([v[:, i] - v[:, j], v[:, i] + v[:, j], v], axis=1).astype(object)
+    rho = np.arange(n, 0, -1)
+    denominator = int(np.prod(np.concatenate([rho[i] - rho[j], rho[i] + rho[j], rho]).astype(object)))
+    chi[regular] = sign.astype(object) * (np.prod(factors, axis=1) // denominator)
+    return chi
+
+def eulerOddGrass_batch(weights: np.array, k: int, n: int) -> np.array:
+    """
+        Euler characteristic of U^weight on IGr(k,2n+1) for many weights at once, as the alternating sum of the Euler 
+        characteristics of the terms U^weight x wedge^i U^{0,\\dots,-1} of the resolution on IGr(k,2n+2).
+
+        Args:
+            weights: a list of N weights of length k (or an (N, k) integer array)
+            k, n: fix IGr(k,2n+1)
+        Returns:
+            chi: an object array of N Python integers
+    """
+    if not (isinstance(weights, np.ndarray) and weights.ndim == 2 and weights.shape[1] == k):
+        weights = np.array([weight_array(weight, k) for weight in weights], dtype=int).reshape(-1, k)
+    owners, positions, products = _wedge_resolution(weights, k)
+    terms = eulerEvenGrass_batch(products, k, n+1) * np.where(positions % 2 == 0, 1, -1).astype(object)
+    chi = np.zeros(len(weights), dtype=object)
+    np.add.at(chi, owners, terms)
+    return chi
+
+def euler_pairing_twists(U_alpha: list, U_beta: list, k: int, n: int, twists: list = None) -> dict:
+    """
+        compute chi(U_alpha(l), U_beta) = sum (-1)^j dim Ext^j(U_alpha(l), U_beta) for many twists l from a single LR product.
+
+        Args:
+            U_alpha, U_beta: as in Ext(U_alpha, U_beta)
+            k, n: fix IGr(k,2n+1)
+            twists: the twists l, default l=0,...,2n+1-k
+        Returns:
+            pairing: a dictionary {l: chi(U_alpha(l), U_beta)}
+    """
+    if twists is None:
+        twists = range(2*n+2-k)
+    twists = list(twists)
+    pairing = _euler_pairings([(U_alpha, U_beta)], k, n, twists)
+    return {l: int(pairing[0, row]) for row, l in enumerate(twists)}
+
+def _euler_pairings(pairs: list, k: int, n: int, twists: list) -> np.array:
+    """
+        chi(U_alpha(l), U_beta) for many pairs and twists: the shifted LR summands of all the pairs 
+        are collected and their Euler characteristics computed once per distinct weight.
+
+        Returns:
+            an object array of shape (len(pairs), len(twists))
+    """
+    products = [LRfactors(Weight(U_alpha, k).dual, U_beta, k) for U_alpha, U_beta in pairs]
+    summands = np.array([p for product in products for p in product], dtype=int).reshape(-1, k)
+    multiplicities = np.array([m for product in products for m in product.values()], dtype=object)
+    owners = np.repeat(np.arange(len(pairs)), [len(product) for product in products])
+    twists = np.array(list(twists), dtype=int)
+    shifted = (summands[np.newaxis, :, :] - twists.reshape(-1, 1, 1)).reshape(-1, k)
+    distinct, inverse = np.unique(shifted, axis=0, return_inverse=True)
+    chi = eulerOddGrass_batch(distinct, k, n)[inverse.reshape(-1)].reshape(len(twists), len(summands))
+    pairing = np.zeros((len(pairs), len(twists)), dtype=object)
+    for row in range(len(twists)):
+        np.add.at(pairing[:, row], owners, chi[row] * multiplicities)
+    return pairing
+
+def Euler_Gram_matrix(except_sequence: list, k: int, n: int) -> np.array:
+    """
+        Gram matrix of the Euler pairing on the collection E_1, ..., E_N, E_1(1), ..., E_N(w) generated 
+        by the twists of a sequence E_1, ..., E_N, with w = 2n+1-k.
+
+        Args:
+            except_sequence: a list of weights presented as lists
+            k, n: fix IGr(k,2n+1)
+        Returns:
+            gram: an object array of shape (N(w+1), N(w+1)), gram[a, b] = chi(F_a, F_b)
+    """
+    w = 2*n+1-k
+    size = len(except_sequence)
+    # chi(E_j(l), E_i(l')) = chi(E_j(l-l'), E_i), table[j, i, l-l'+w]
+    pairs = [(except_sequence[j], except_sequence[i]) for j in range(size) for i in range(size)]
+    table = _euler_pairings(pairs, k, n, range(-w, w+1)).reshape(size, size, 2*w+1)
+    a = np.arange(size*(w+1))
+    return table[(a % size)[:, np.newaxis], (a % size)[np.newaxis, :], (a // size)[:, np.newaxis] - (a // size)[np.newaxis, :] + w]
+
+def is_unitriangular(gram: np.array) -> bool:
+    """
+    is gram upper triangular with ones on the diagonal?
+    """
+    return all(gram[a, a] == 1 for a in range(len(gram))) and not np.any(np.tril(gram != 0, -1))
+
+def Euler_precheck(except_sequence: list, k: int, n: int) -> Tuple[bool, np.array]:
+    """
+        necessary condition for except_sequence to be a Lefschetz basis: the Gram matrix of the Euler pairing 
+        on the collection generated by its twists is upper unitriangular.
+
+        Returns:
+            boolean: True if the Gram matrix is upper unitriangular
+            gram: the Gram matrix, see Euler_Gram_matrix
+    """
+    gram = Euler_Gram_matrix(except_sequence, k, n)
+    return is_unitriangular(gram), gram
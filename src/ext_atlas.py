@@ -0,0 +1,201 @@
+"""
+A persistent atlas of Ext(U_alpha(l), U_beta) on IGr(k,2n+1) for all the pairs of dominant weights 
+with entries in a box low <= entries <= high and all the twists l=0,...,2n+1-k.
+
+An atlas is a directory with
+    - meta.json: k, n, low, high and the number of weights;
+    - weights.npy: the (N, k) array of the weights of the box;
+    - profiles.npy: an (N, N) uint64 matrix, bit l of profiles[a, b] is set if Ext(U_a(l), U_b) = 0 
+      (so an atlas holds at most MAX_TWISTS = 64 twists, 2n+2-k <= 64);
+    - offsets.npy, summands.npy: the non-vanishing summands in CSR format, the rows 
+      summands[offsets[a*N+b]:offsets[a*N+b+1]] are (l, weight, multiplicity) for the pair (a, b);
+    - done.npy: while building, a boolean mask of the rows a already computed, so that the build can be resumed.
+The arrays are opened with mmap, so loading an atlas does not read it in memory. 
+Once registered with use_ext_atlas, extOddGrass, extOddGrass_twists, Lefschetz_indep and is_Lefschetz_excep 
+answer with a lookup for pairs in the box.
+"""
+
+import itertools
+import json
+import os
+import numpy as np
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Tuple
+
+from src.utilities import weight_array
+from src.vanishing_odd import extOddGrass_twists, use_ext_atlas
+
+# number of bits of the uint64 profiles
+MAX_TWISTS = 64
+
+def box_weights(k: int, low: int, high: int) -> np.array:
+    """
+    Return:
+        the (N, k) array of dominant weights with low <= entries <= high
+    """
+    weights = list(itertools.combinations_with_replacement(range(high, low-1, -1), k))
+    return np.array(weights, dtype=int).reshape(-1, k)
+
+def _save(path: str, array: np.array):
+    np.save(path + ".tmp.npy", array)
+    os.replace(path + ".tmp.npy", path)
+
+def _atlas_rows(path: str, rows: list, k: int, n: int) -> list:
+    """
+    compute the rows of an atlas: for every alpha in rows the profiles of all the pairs (alpha, beta), 
+    written in profiles.npy, and the non-vanishing summands, written in rows/<alpha>.npy
+    """
+    weights = np.load(os.path.join(path, "weights.npy"))
+    profiles = np.load(os.path.join(path, "profiles.npy"), mmap_mode="r+")
+    twists = range(2*n+2-k)
+    for a in rows:
+        summands = []
+        for b, beta in enumerate(weights):
+            profile, nonvanish = extOddGrass_twists(weights[a], beta, k, n, twists)
+            profiles[a, b] = sum(1 << l for l in twists if profile[l])
+            for l in sorted(nonvanish):
+                for p, mult in sorted(nonvanish[l].items()):
+                    summands.append((b, l) + p + (mult,))
+        profiles.flush()
+        _save(os.path.join(path, "rows", f"{a}.npy"), np.array(summands, dtype=np.int64).reshape(-1, k+3))
+    return rows
+
+class ExtAtlas:
+    """
+    An Ext atlas opened from disk, see the module docstring for the format.
+
+    Attributes:
+        path: directory of the atlas
+        k, n: fix IGr(k,2n+1)
+        low, high: the box of the weights
+        weights, profiles, offsets, summands: the memory-mapped arrays
+        index: a dictionary {weight: row}
+    """
+    def __init__(self, path: str):
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        if not meta["complete"]:
+            raise Exception(f"The atlas in {path} is not complete, resume it with ExtAtlas.build")
+        self.path = path
+        self.k = meta["k"]
+        self.n = meta["n"]
+        self.low = meta["low"]
+        self.high = meta["high"]
+        self.weights = np.load(os.path.join(path, "weights.npy"), mmap_mode="r")
+        self.profiles = np.load(os.path.join(path, "profiles.npy"), mmap_mode="r")
+        self.offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode="r")
+        self.summands = np.load(os.path.join(path, "summands.npy"), mmap_mode="r")
+        self.index = {tuple(int(i) for i in weight): row for row, weight in enumerate(self.weights)}
+
+    @classmethod
+    def build(cls, path: str, k: int, n: int, low: int, high: int, workers: int = 1, chunksize: int = 4):
+        """
+        compute the atlas of the box low <= entries <= high in the directory path, 
+        resuming a previous build if path already contains one.
+
+        Return:
+            the ExtAtlas
+        """
+        if 2*n+2-k > MAX_TWISTS:
+            raise Exception(f"The profiles of an atlas are uint64 bitmasks, the {2*n+2-k} twists of IGr({k},{2*n+1}) do not fit")
+        meta = {"k": k, "n": n, "low": low, "high": high}
+        weights = box_weights(k, low, high)
+        if os.path.exists(os.path.join(path, "meta.json")):
+            with open(os.path.join(path, "meta.json")) as f:
+                saved = json.load(f)
+            if any(saved[key] != value for key, value in meta.items()):
+                raise Exception(f"{path} contains a different atlas")
+            if saved["complete"]:
+                return cls(path)
+            done = np.load(os.path.join(path, "done.npy"))
+        else:
+            os.makedirs(os.path.join(path, "rows"), exist_ok=True)
+            np.save(os.path.join(path, "weights.npy"), weights)
+            np.lib.format.open_memmap(os.path.join(path, "profiles.npy"), mode="w+", dtype=np.uint64, shape=(len(weights),)*2).flush()
+            done = np.zeros(len(weights), dtype=bool)
+            _save(os.path.join(path, "done.npy"), done)
+            with open(os.path.join(path, "meta.json"), "w") as f:
+                json.dump(dict(meta, size=len(weights), complete=False), f)
+        todo = [int(a) for a in np.nonzero(~done)[0]]
+        chunks = [todo[i:i+chunksize] for i in range(0, len(todo), chunksize)]
+        if workers == 1:
+            finished = (_atlas_rows(path, chunk, k, n) for chunk in chunks)
+        else:
+            executor = ProcessPoolExecutor(max_workers=workers)
+            finished = executor.map(_atlas_rows, [path]*len(chunks), chunks, [k]*len(chunks), [n]*len(chunks))
+        try:
+            for rows in finished:
+                done[rows] = True
+                _save(os.path.join(path, "done.npy"), done)
+        finally:
+            if workers != 1:
+                executor.shutdown(cancel_futures=True)
+        cls._finalize(path, k, len(weights))
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump(dict(meta, size=len(weights), complete=True), f)
+        return cls(path)
+
+    @staticmethod
+    def _finalize(path: str, k: int, size: int):
+        """
+        gather the rows in the CSR arrays offsets.npy and summands.npy
+        """
+        counts = np.zeros(size*size, dtype=np.int64)
+        total = 0
+        for a in range(size):
+            row = np.load(os.path.join(path, "rows", f"{a}.npy"))
+            counts[a*size:(a+1)*size] = np.bincount(row[:, 0], minlength=size)
+            total += len(row)
+        summands = np.lib.format.open_memmap(os.path.join(path, "summands.npy"), mode="w+", dtype=np.int64, shape=(total, k+2))
+        position = 0
+        for a in range(size):
+            row = np.load(os.path.join(path, "rows", f"{a}.npy"))
+            summands[position:position+len(row)] = row[:, 1:]
+            position += len(row)
+        summands.flush()
+        _save(os.path.join(path, "offsets.npy"), np.concatenate([[0], np.cumsum(counts)]))
+        for a in range(size):
+            os.remove(os.path.join(path, "rows", f"{a}.npy"))
+        os.rmdir(os.path.join(path, "rows"))
+        os.remove(os.path.join(path, "done.npy"))
+
+    def _pair(self, U_alpha, U_beta):
+        a = self.index.get(tuple(int(i) for i in weight_array(U_alpha, self.k)))
+        b = self.index.get(tuple(int(i) for i in weight_array(U_beta, self.k)))
+        if a is None or b is None:
+            return None
+        return a, b
+
+    def profile(self, U_alpha, U_beta) -> dict:
+        """
+        Return:
+            a dictionary {l: True if Ext(U_alpha(l), U_beta) = 0} for l=0,...,2n+1-k, None if the pair is not in the atlas
+        """
+        pair = self._pair(U_alpha, U_beta)
+        if pair is None:
+            return None
+        bits = int(self.profiles[pair])
+        return {l: bool(bits >> l & 1) for l in range(2*self.n+2-self.k)}
+
+    def query(self, U_alpha, U_beta, twists: list = None) -> Tuple[dict, dict]:
+        """
+        Return:
+            profile, nonvanish: as in extOddGrass_twists, None if the pair is not in the atlas
+        """
+        pair = self._pair(U_alpha, U_beta)
+        if pair is None:
+            return None
+        if twists is None:
+            twists = range(2*self.n+2-self.k)
+        if any(l not in range(2*self.n+2-self.k) for l in twists):
+            return None
+        bits = int(self.profiles[pair])
+        profile = {l: bool(bits >> l & 1) for l in twists}
+        position = pair[0]*len(self.weights) + pair[1]
+        nonvanish = {}
+        for row in self.summands[self.offsets[position]:self.offsets[position+1]]:
+            l = int(row[0])
+            if l in profile:
+                nonvanish.setdefault(l, Counter())[tuple(int(i) for i in row[1:-1])] = int(row[-1])
+        return profile, nonvanish
@@ -1,30 +1,40 @@
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 import copy
 
-# TODO: refactor code and implement staircase with the function,
-#  avoid storing twists as dictionary and just have the bundles to generate as a list
+from src.instrument import instrumented
+from src.complex import staircase_weights
 
 """
 This section implements the method described in sec. 1.5 in the dissertation. 
+The set T, the staircase rule (the staircase of one shape generates a row and a column of shapes) and the 
+symplectic relation rule are the ones of IGr(3,2n+1): they are not known for k > 3, so the fullness tests 
+only accept k = 3, while convert and staircase work for every k.
 """
 
 def convert(weights):
     """
-        convert list of weights of length 3 in format U^{w1,w2,w3} to U^{w1-w2, 0, w3-w2}(w2). 
-        We store list of bundles as a dictionary {(a,b): twists in the list}.
+        convert list of weights of length k >= 2 in format U^{w1,w2,...,wk} to U^{w1-w2, 0, w3-w2, ..., wk-w2}(w2). 
+        We store list of bundles as a dictionary {(w1-w2, w3-w2, ..., wk-w2): twists in the list}, for k=3 {(a,b): twists}.
 
         Args:
-            weights: a list of weights of len 3 in format U^{w1,w2,w3}
+            weights: a list of weights of len k in format U^{w1,...,wk}
 
         Returns:
             shrunk_weights:  a defaultdict {(a,b): set(twists)}, such that U^{a,0,b}(twists) \in weights.
     """
     shrunk_weights = defaultdict(set)
     for i in weights:
-        shrunk_weights[tuple([i[0]-i[1], i[2]-i[1]])].add(i[1])
+        shrunk_weights[tuple([i[0]-i[1]] + [i[r]-i[1] for r in range(2, len(i))])].add(i[1])
     return shrunk_weights
 
-def fullness_test(basis, k, n, max_iter = 20):
+def shape_weight(shape):
+    """
+        weight of U^{a,0,b} for a shape (a,b) of convert, in general (w1, 0, w3, ..., wk) for (w1, w3, ..., wk)
+    """
+    return tuple(shape[:1]) + (0,) + tuple(shape[1:])
+
+@instrumented()
+def fullness_test(basis, k, n, max_iter = 20, verbose = False):
     """
         iterate through staircase rule and wedge product rule to see if it is possible to generate from a list of bundles (basis) 
         the set T in max iterations (def 20).
@@ -32,15 +42,19 @@ def fullness_test(basis, k, n, max_iter = 20):
         - application of all possible staircase complex rules;
         - application of all possible symplectic relations rule;
         
-        For n= 4, 5, max_iterations 10 is enough.
+        For n= 4, 5, max_iterations 10 is enough. 
+        fullness_bitmask.fullness_test_bitmask runs the same rules on bitmasks until a fixpoint, without max_iter.
 
         Args:
             basis: a list of weights of len 3 in format U^{w1,w2,w3} to test
             k, n: fix IGr(k,2n+1), relevant for wedge power and staircase
+            verbose: print the iterations and the twists added by the rules
 
         Returns:
             boolean: can I generate T from basis in iterations<max_iter
     """
+    if k != 3:
+        raise Exception("The fullness rules and the set T are known only for k=3, there is no fullness test for IGr(k,2n+1) with k!=3")
     #Fano index
     w = 2*n + 1 - k
     generated = convert(basis)
@@ -52,36 +66,50 @@ def fullness_test(basis, k, n, max_iter = 20):
     for i in range(max_iter):
         if generated == final_configuration:
             return True
-        print("Iteration", i)
-        generated = apply_staircase(generated,k,n)
-        generated = apply_wedge(generated,k,n)
+        if verbose:
+            print("Iteration", i)
+        generated = apply_staircase(generated,k,n,verbose)
+        generated = apply_wedge(generated,k,n,verbose)
         i+=1
     return False
 
+def has_staircase(shape, k, n) -> bool:
+    """
+        is the staircase of U^{a,0,b} defined on IGr(k,2n+1), that is, is the weight dominant with a-b <= 2n+1-k? 
+        The staircase rule is not applied to the other shapes.
+    """
+    weight = shape_weight(shape)
+    return all(weight[i] >= weight[i+1] for i in range(len(weight)-1)) and weight[0]-weight[-1] <= 2*n+1-k
+
+#staircases computed by staircase, {(shape, k, n): tuple of (shape, twists)}, with LRU eviction
+STAIRCASES_MEMO_SIZE = 4096
+_staircases = OrderedDict()
+
 def staircase(weight, k, n):
     """
-        construction of truncated staircase complex for k=3 avoiding the last term
+        construction of truncated staircase complex avoiding the last term, from the terms of complex.staircase_weights
 
         Args:
-            weight: a weight  in format U^{a,0,-b} to compute the staircase of
+            weight: a weight  in format U^{a,0,-b} to compute the staircase of, given as the shape (a,-b) of convert
             k, n: fix IGr(k,2n+1), relevant for wedge power and staircase
 
         Returns:
             stairc_cpx: a dictionary of bundles and twists in the staircase complex.
     """
-    # TODO: merge with complex.py staircase function
-    a = weight[0]
-    b = -weight[1]
-    c =  2*n - k - a - b
-    stair_cpx = defaultdict(set)
-    for i in range(0, a+1):
-        stair_cpx[tuple([a-i,-b])].add(0)
-    for i in range(0, b):
-        # use add and defaultdictionary because a term can appear twice with different twists
-        stair_cpx[tuple([i,i+1-b])].add(-i-1)
-    for i in range(0, c+1):
-        stair_cpx[tuple([b,-i])].add(-b-1)
-    return stair_cpx
+    key = (tuple(int(i) for i in weight), k, n)
+    if key in _staircases:
+        _staircases.move_to_end(key)
+    else:
+        stair_cpx = defaultdict(set)
+        # the term in degree 0 is the last one, the others are visited from the weight itself
+        terms = list(staircase_weights(shape_weight(weight), k, 2*n+1))
+        for _, term, _ in terms[:0:-1]:
+            # use add and defaultdictionary because a term can appear twice with different twists
+            stair_cpx[tuple([term[0]-term[1]] + [term[r]-term[1] for r in range(2, k)])].add(term[1])
+        _staircases[key] = tuple((shape, frozenset(twists)) for shape, twists in stair_cpx.items())
+        if len(_staircases) > STAIRCASES_MEMO_SIZE:
+            _staircases.popitem(last=False)
+    return defaultdict(set, {shape: set(twists) for shape, twists in _staircases[key]})
 
 def evolvable(generated, cpx, w):
     """
@@ -105,26 +133,133 @@ def evolvable(generated, cpx, w):
             contained.append(twist)
     return contained
 
-def apply_wedge(generated,k,n):
+class SymplecticRule:
+    """
+    Symplectic relation rule used by apply_wedge: a bundle U^{a,0,b} with a-b >= n+2-k gets the twists shared by 
+    all the other bundles with a'-b' <= a-b. 
+    The shapes are grouped by column a-b and visited by increasing column, keeping the running intersection 
+    of the twists of the previous columns; inside a column the intersection of all the other shapes is obtained 
+    from prefix and suffix intersections, so the rule costs one pass over every column.
+    The twists of a shape can be stored either as sets or as bitmasks (see fullness_bitmask).
+    The shapes are indexed by column once, when they are added with add_shapes, and the index is kept between 
+    the applications of the rule.
+
+    Attributes:
+        k, n: fix IGr(k,2n+1)
+        w: Fano index 2n+1-k
+        columns: the columns where the rule adds twists, n+2-k,...,w
+        by_column: the index {column: shapes in the column, in the order they were added}
+        indexed: the set of the shapes in the index
+    """
+    def __init__(self, k, n):
+        self.k = k
+        self.n = n
+        self.w = 2*n+1-k
+        self.columns = range(n+2-k, self.w+1)
+        self.by_column = defaultdict(list)
+        self.indexed = set()
+
+    def add_shapes(self, shapes):
+        """
+        add to the column index the shapes not in it yet
+        """
+        for s in shapes:
+            if s not in self.indexed:
+                self.indexed.add(s)
+                self.by_column[s[0]-s[1]].append(s)
+
+    def remove_shapes(self, shapes):
+        """
+        remove shapes from the column index
+        """
+        for s in shapes:
+            if s in self.indexed:
+                self.indexed.discard(s)
+                self.by_column[s[0]-s[1]].remove(s)
+
+    def apply(self, generated, full = None) -> dict:
+        """
+        Args:
+            generated: a dictionary {(a,b): twists} with an entry for every indexed shape, 
+                with twists stored as sets or as bitmasks
+            full: all twists 0,...,w in the same format, default the set
+
+        Returns:
+            additions: a dictionary {(a,b): twists after the rule} for the shapes that got new twists
+        """
+        if full is None:
+            full = set(range(self.w+1))
+        additions = {}
+        # intersection of the twists of all the shapes in the previous columns
+        prefix = full
+        for column in sorted(self.by_column):
+            if column > self.w:
+                break
+            shapes = self.by_column[column]
+            if column in self.columns:
+                suffix = [full]*(len(shapes)+1)
+                for index in range(len(shapes)-1, -1, -1):
+                    suffix[index] = suffix[index+1] & generated[shapes[index]]
+                running = prefix
+                for index, t in enumerate(shapes):
+                    updated = generated[t] | (running & suffix[index+1])
+                    if updated != generated[t]:
+                        additions[t] = updated
+                    running = running & generated[t]
+            for t in shapes:
+                prefix = prefix & generated[t]
+        return additions
+
+def iter_wedge(generated,k,n):
+    """
+    Symplectic relation rule as a generator of derivations, see apply_wedge.
+
+    Args:
+        generated: defaultdict of weights and twists
+        k,n: fix IGr(k,2n+1)
+
+    Yields:
+        records: dictionaries {"rule": "symplectic", "shape": t, "twists": the twists added to t}
+    """
+    rule = SymplecticRule(k, n)
+    rule.add_shapes(generated.keys())
+    additions = rule.apply(generated)
+    for t in generated.keys():
+        if t in additions:
+            yield {"rule": "symplectic", "shape": t, "twists": additions[t] - generated[t]}
+
+@instrumented()
+def apply_wedge(generated,k,n,verbose=False):
     """
     Apply symplectic relation rule. If a weight with a-b >= n+2-k and all other bundles with a'- b' <= a - b are contained in 
     generated for some twist, then we add it to U^{a,0,b} as well. 
-    We print out the added terms
+    The derivations are yielded by iter_wedge.
 
     Args:
         generated: defaultdict of weights and twists
         k,n: fix IGr(k,2n+1)
+        verbose: print out the added terms
 
     Returns:
         added: dictionary of weights and twists after application of symplectic rule
-        + print out the added terms
+    """
+    added = copy.deepcopy(generated)
+    for record in iter_wedge(generated,k,n):
+        added[record["shape"]] = added[record["shape"]] | record["twists"]
+        if verbose:
+            print(f"Using symplectic relations, we obtain for {record['shape']} the additional twists:", record["twists"])
+    return added
+
+def apply_wedge_naive(generated,k,n):
+    """
+    Previous implementation of apply_wedge (without printing), rescanning all the shapes for every bundle. 
+    Kept as a reference to test and benchmark SymplecticRule.
     """
     added = copy.deepcopy(generated)
     w = 2*n+1-k
     # iterate through the columns where we can apply symplectic relations
     for i in range(n+2-k, w+1):
         # iterate through every bundle with a+b=i
-        # TODO: improve the iteration to avoid nested for
         for t in generated.keys():
             if t[0]-t[1] == i:
                 common_part = set(range(w+1))
@@ -134,44 +269,67 @@ def apply_wedge(generated,k,n):
                         common_part = common_part.intersection(generated[s])
                 # add the common twists
                 added[t]=generated[t].union(common_part)
-    # print out the added terms if any 
-    for t in generated.keys():
-        if added[t] != generated[t]:
-            print(f"Using symplectic relations, we obtain for {t} the additional twists:", added[t] - generated[t])
     return added
 
-def apply_staircase(generated,k,n):
+def iter_staircase(generated,k,n):
     """
-    TODO: to change w and understand
-    Apply symplectic relation rule. If a weight with a-b >= n+2-k and all other bundles with a'- b' <= a - b are contained in 
-    generated for some twist, then we add it to U^{a,0,b} as well. 
-    We print out the added terms
+    Staircase rule as a generator of derivations, see apply_staircase. The staircases are applied one after the other, 
+    each one on the result of the previous ones.
 
     Args:
         generated: defaultdict of weights and twists
         k,n: fix IGr(k,2n+1)
 
-    Returns:
-        added: dictionary of weights and twists after application of symplectic rule
-        + print out the added terms
+    Yields:
+        records: dictionaries {"rule": "staircase", "shape": t, "twists": the admissible twists of the staircase of t, 
+            "added": {shape: twists added}} for every staircase that changes the generated bundles. 
+            "added" also lists, with an empty set, the shapes that the staircase reaches for the first time.
     """
-    applied_staircase = {}
-    w = 2*n+2-k
+    #Fano index
+    w = 2*n+1-k
     added = copy.deepcopy(generated)
     for t in generated.keys():
-        before_staircase =  copy.deepcopy(added)
+        if not has_staircase(t,k,n):
+            continue
         cpx = staircase(t,k,n)
+        # the staircase of t only changes these shapes (evolvable adds the missing terms of cpx with no twists)
+        touched = list(cpx.keys()) + [tuple([j,t[1]]) for j in range(w+1+t[1])] + [tuple([-t[1],-j]) for j in range(w+1+t[1])]
+        before_staircase = {d: added[d] for d in touched if d in added}
         admissible_twists = evolvable(added, cpx, w)
-        for j in range(w+t[1]):
+        for j in range(w+1+t[1]):
             added[tuple([j,t[1]])] = added[tuple([j,t[1]])].union(admissible_twists)
-        for j in range(w+t[1]):
+        for j in range(w+1+t[1]):
             added[tuple([-t[1],-j])] = added[tuple([-t[1],-j])].union(set([g-1+t[1] for g in admissible_twists if g-1+t[1]>=0]))
-        if added != before_staircase:
-            applied_staircase.update({t:admissible_twists})
-    for a in applied_staircase.keys():
-        if len(applied_staircase[a])!= 0:
-            print("Stair ",a," twists ", applied_staircase[a])
-    for d in added.keys():
-        if added[d] != generated[d]:
-            print(f"Staircase added at {d} the following twists {added[d] - generated[d]}")
+        changes = {d: added[d] - before_staircase.get(d, set()) for d in touched 
+                   if d not in before_staircase or added[d] != before_staircase[d]}
+        if len(changes) != 0:
+            yield {"rule": "staircase", "shape": t, "twists": admissible_twists, "added": changes}
+
+@instrumented()
+def apply_staircase(generated,k,n,verbose=False):
+    """
+    Apply staircase rule: if all the terms but the last one of a staircase complex are generated for some twist, 
+    the last one is generated as well. 
+    The derivations are yielded by iter_staircase.
+
+    Args:
+        generated: defaultdict of weights and twists
+        k,n: fix IGr(k,2n+1)
+        verbose: print out the added terms
+
+    Returns:
+        added: dictionary of weights and twists after application of staircase rule
+    """
+    added = copy.deepcopy(generated)
+    records = list(iter_staircase(generated,k,n))
+    for record in records:
+        for d, twists in record["added"].items():
+            added[d] = added[d] | twists
+    if verbose:
+        for record in records:
+            if len(record["twists"])!= 0:
+                print("Stair ",record["shape"]," twists ", record["twists"])
+        for d in added.keys():
+            if added[d] != generated[d]:
+                print(f"Staircase added at {d} the following twists {added[d] - generated[d]}")
     return added
\ No newline at end of file
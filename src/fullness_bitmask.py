@@ -0,0 +1,451 @@
+"""
+This module implements the method of fullness.py (sec. 1.5 in the dissertation) with bitmasks.
+
+Every shape (a, b), standing for U^{a,0,b}, is mapped to an integer whose bit l is set if U^{a,0,b}(l) is generated: 
+twisting becomes a bit shift and checking that some twists are generated becomes an AND. 
+The rules are applied from a worklist: when the twists of a shape change, only the rules reading that shape 
+are applied again, until a fixpoint is reached.
+
+The symplectic rule of fullness.apply_wedge only looks at the shapes already stored in the dictionary; 
+here we store from the start every shape that the staircase rule would eventually create, 
+so the fixpoint does not depend on the order in which rules are applied.
+"""
+
+from collections import defaultdict, deque
+
+from src.fullness import convert, staircase, has_staircase, SymplecticRule
+from src.instrument import instrumented
+
+def to_masks(generated: dict) -> dict:
+    """
+    convert a dictionary {(a,b): set(twists)} into {(a,b): bitmask of twists}. Twists must be non-negative.
+    """
+    masks = {}
+    for shape, twists in generated.items():
+        masks[tuple(int(i) for i in shape)] = sum(1 << int(twist) for twist in set(twists))
+    return masks
+
+def from_masks(masks: dict) -> defaultdict:
+    """
+    convert a dictionary {(a,b): bitmask of twists} into {(a,b): set(twists)}
+    """
+    generated = defaultdict(set)
+    for shape, mask in masks.items():
+        generated[shape] = {twist for twist in range(mask.bit_length()) if mask >> twist & 1}
+    return generated
+
+def shift(mask: int, offset: int) -> int:
+    """
+    bitmask of the twists l + offset for l in mask, dropping negative twists
+    """
+    return mask << offset if offset >= 0 else mask >> -offset
+
+def final_shapes(k: int, n: int) -> list:
+    """
+    shapes of the set T = U^{i,0,-j}, i+j <= 2n+1-k, that should be generated with all twists 0,...,2n+1-k
+    """
+    w = 2*n+1-k
+    return [(i, -j) for i in range(w+1) for j in range(w+1-i)]
+
+class BitmaskFullness:
+    """
+    State of the bitmask fullness test for a basis on IGr(k, 2n+1).
+
+    Attributes:
+        k, n: fix IGr(k,2n+1)
+        w: Fano index 2n+1-k
+        final: the set of shapes of T
+        masks: a dictionary {(a,b): bitmask of generated twists}, with an entry for every shape reached by the rules
+        extraneous: the bundles (shape, twist) of the basis outside T, if any T can never be equal to the generated set
+        staircases: a dictionary {(a,b): list of (shape, offset)}, the staircase complex used by the rule of (a,b), 
+            None if (a,b) has no staircase (see fullness.has_staircase)
+        readers: a dictionary {shape: set of (a,b) whose staircase contains shape}
+        symplectic: the SymplecticRule applied to the bitmasks
+        log: a list of the additions, as tuples (rule, shape, added bitmask). Rules are ("staircase", t, offset), 
+            adding the admissible twists of t shifted by offset, or ("symplectic", column)
+    """
+    def __init__(self, basis: list, k: int, n: int):
+        """
+        Constructor for BitmaskFullness.
+
+        Args:
+            basis: a list of weights of len 3 in format U^{w1,w2,w3}
+            k, n: fix IGr(k,2n+1)
+        """
+        if k != 3:
+            raise Exception("The fullness rules and the set T are known only for k=3, there is no fullness test for IGr(k,2n+1) with k!=3")
+        self.k = k
+        self.n = n
+        self.w = 2*n+1-k
+        self.full = (1 << (self.w+1)) - 1
+        self.final = set(final_shapes(k, n))
+        self.masks = {}
+        self.extraneous = set()
+        self.staircases = {}
+        self.readers = defaultdict(set)
+        self.log = []
+        self.symplectic = SymplecticRule(k, n)
+        for shape, twists in convert(basis).items():
+            for twist in twists:
+                self._add_bundle(tuple(int(i) for i in shape), int(twist))
+        self._close_shapes(list(self.masks))
+
+    def _add_bundle(self, shape: tuple, twist: int) -> bool:
+        """
+        add a bundle of the basis, return True if it was not generated yet
+        """
+        if twist < 0 or twist > self.w or shape not in self.final:
+            self.extraneous.add((shape, twist))
+        if twist < 0 or twist > self.w:
+            return False
+        if shape not in self.masks:
+            self._new_shape(shape)
+        new = not (self.masks[shape] >> twist & 1)
+        self.masks[shape] |= 1 << twist
+        return new
+
+    def _new_shape(self, shape: tuple):
+        """
+        add a shape with no twists to masks and to the column index of the symplectic rule
+        """
+        self.masks[shape] = 0
+        self.symplectic.add_shapes([shape])
+
+    def _close_shapes(self, pending: list) -> list:
+        """
+        add (with no twists) every shape that the staircase rule of fullness.apply_staircase creates from pending
+
+        Return:
+            new_shapes: the shapes added to masks (pending included) and their staircase rules
+        """
+        pending = deque(shape for shape in pending if shape not in self.staircases)
+        new_shapes = list(pending)
+        for shape in pending:
+            if shape not in self.masks:
+                self._new_shape(shape)
+        while pending:
+            t = pending.popleft()
+            if not has_staircase(t, self.k, self.n):
+                self.staircases[t] = None
+                continue
+            cpx = [(tuple(int(i) for i in shape), int(offset)) for shape, offsets in staircase(t, self.k, self.n).items() 
+                   for offset in offsets]
+            self.staircases[t] = cpx
+            targets = [shape for shape, _ in cpx] + self._staircase_targets(t)
+            for shape, _ in cpx:
+                self.readers[shape].add(t)
+            for shape in targets:
+                if shape not in self.masks:
+                    self._new_shape(shape)
+                if shape not in self.staircases and shape not in pending:
+                    pending.append(shape)
+                    new_shapes.append(shape)
+        return new_shapes
+
+    def _staircase_targets(self, t: tuple) -> list:
+        return [(j, t[1]) for j in range(self.w+1+t[1])] + [(-t[1], -j) for j in range(self.w+1+t[1])]
+
+    def column(self, shape: tuple) -> int:
+        return shape[0] - shape[1]
+
+    def _update(self, rule: tuple, shape: tuple, mask: int) -> bool:
+        added = mask & ~self.masks[shape]
+        if added == 0:
+            return False
+        self.masks[shape] |= added
+        self.log.append((rule, shape, added))
+        return True
+
+    @instrumented()
+    def apply_staircase_rule(self, t: tuple) -> list:
+        """
+        staircase rule of fullness.apply_staircase for the shape t, on bitmasks.
+
+        Return:
+            changed: the list of shapes whose twists changed
+        """
+        if self.staircases[t] is None:
+            return []
+        # twists l such that every term of the staircase complex (but the last) is generated in U(l), as in evolvable
+        admissible = self.full
+        for shape, offset in self.staircases[t]:
+            admissible &= shift(self.masks[shape], -offset)
+        changed = []
+        if admissible == 0:
+            return changed
+        for j in range(self.w+1+t[1]):
+            if self._update(("staircase", t, 0), (j, t[1]), admissible):
+                changed.append((j, t[1]))
+            if self._update(("staircase", t, t[1]-1), (-t[1], -j), shift(admissible, t[1]-1)):
+                changed.append((-t[1], -j))
+        return changed
+
+    @instrumented()
+    def apply_wedge_rule(self) -> list:
+        """
+        symplectic relation rule of fullness.apply_wedge for all the columns, on bitmasks (see fullness.SymplecticRule).
+
+        Return:
+            changed: the list of shapes whose twists changed
+        """
+        changed = []
+        for t, updated in self.symplectic.apply(self.masks, self.full).items():
+            if self._update(("symplectic", self.column(t)), t, updated):
+                changed.append(t)
+        return changed
+
+    def run(self, rules: list = None) -> bool:
+        """
+        apply the rules until nothing changes.
+
+        Args:
+            rules: the rules to apply first, as ("staircase", t) or ("symplectic",), default all of them
+
+        Return: 
+            boolean: is T generated by the basis?
+        """
+        if rules is None:
+            rules = [("staircase", t) for t in self.staircases] + [("symplectic",)]
+        worklist = deque(dict.fromkeys(rules))
+        queued = set(worklist)
+        while worklist:
+            rule = worklist.popleft()
+            queued.discard(rule)
+            if rule[0] == "staircase":
+                changed = self.apply_staircase_rule(rule[1])
+            else:
+                changed = self.apply_wedge_rule()
+            for shape in changed:
+                dependents = [("staircase", t) for t in self.readers[shape]]
+                if self.column(shape) <= self.w:
+                    dependents.append(("symplectic",))
+                for dependent in dependents:
+                    if dependent not in queued:
+                        queued.add(dependent)
+                        worklist.append(dependent)
+        return self.is_full()
+
+    def is_full(self) -> bool:
+        """
+        is T generated, i.e. are the generated bundles exactly U^{i,0,-j}(l) for i+j <= w and l = 0,...,w?
+        """
+        if len(self.extraneous) != 0:
+            return False
+        return all(self.masks.get(shape, 0) == self.full for shape in final_shapes(self.k, self.n))
+
+    def generated(self) -> defaultdict:
+        """
+        the generated bundles as a dictionary {(a,b): set(twists)}, as in fullness.py
+        """
+        return from_masks(self.masks)
+
+def fullness_test_bitmask(basis, k, n, verbose = False) -> bool:
+    """
+        bitmask version of fullness.fullness_test: apply the staircase and symplectic relation rules 
+        until a fixpoint is reached, instead of a fixed number of iterations.
+
+        Args:
+            basis: a list of weights of len 3 in format U^{w1,w2,w3} to test
+            k, n: fix IGr(k,2n+1)
+            verbose: print the twists added by every rule
+
+        Returns:
+            boolean: can I generate T from basis?
+    """
+    state = BitmaskFullness(basis, k, n)
+    full = state.run()
+    if verbose:
+        for rule, shape, added in state.log:
+            print(f"{rule[0]} {rule[1]} added at {shape} the twists {sorted(from_masks({shape: added})[shape])}")
+    return full
+
+class FullnessSession(BitmaskFullness):
+    """
+    Stateful fullness test, recording how every bundle is generated. Bundles can be added to or removed from 
+    the basis: only the rules reading the changed bundles are applied again, and on removal only the bundles 
+    whose derivation depends on the removed ones are discarded and derived again (if possible).
+
+    A generated bundle is a pair (shape, twist). Its derivation is a pair (rule, premises): the rule is ("basis",), 
+    ("staircase", t, offset, g) (the staircase complex of t, generated in U(g), gives the twist g + offset) 
+    or ("symplectic", column); premises is the frozenset of bundles used by the rule.
+
+    Attributes:
+        basis: the set of bundles (shape, twist) of the basis
+        derivations: a dictionary {(shape, twist): (rule, premises)} for the generated bundles
+        dependents: a dictionary {(shape, twist): set of bundles with it among their premises}
+    """
+    def __init__(self, basis: list, k: int, n: int):
+        """
+        Constructor for FullnessSession, runs the rules on the initial basis.
+
+        Args:
+            basis: a list of weights of len 3 in format U^{w1,w2,w3}
+            k, n: fix IGr(k,2n+1)
+        """
+        self.basis = set()
+        self.derivations = {}
+        self.dependents = defaultdict(set)
+        super().__init__(basis, k, n)
+        self.run()
+
+    def _add_bundle(self, shape: tuple, twist: int) -> bool:
+        if (shape, twist) in self.extraneous:
+            return False
+        new = super()._add_bundle(shape, twist)
+        if 0 <= twist <= self.w:
+            self.basis.add((shape, twist))
+            self._record((shape, twist), ("basis",), frozenset())
+        return new
+
+    def _record(self, bundle: tuple, rule: tuple, premises: frozenset):
+        old = self.derivations.get(bundle)
+        if old is not None:
+            for premise in old[1]:
+                self.dependents[premise].discard(bundle)
+        self.derivations[bundle] = (rule, premises)
+        for premise in premises:
+            self.dependents[premise].add(bundle)
+
+    def _update(self, rule: tuple, shape: tuple, mask: int) -> bool:
+        added = mask & ~self.masks[shape]
+        for twist in range(added.bit_length()):
+            if added >> twist & 1:
+                if rule[0] == "staircase":
+                    t, offset = rule[1], rule[2]
+                    g = twist - offset
+                    premises = frozenset((element, g + o) for element, o in self.staircases[t])
+                    self._record((shape, twist), rule + (g,), premises)
+                else:
+                    premises = frozenset((s, twist) for s in self.masks if self.column(s) <= rule[1] and s != shape)
+                    self._record((shape, twist), rule, premises)
+        return super()._update(rule, shape, mask)
+
+    def _invalidate(self, bundles: list) -> set:
+        """
+        discard the bundles and, recursively, all the bundles derived from them (basis bundles are kept)
+
+        Return:
+            affected: the shapes that lost some twists
+        """
+        affected = set()
+        pending = list(bundles)
+        while pending:
+            bundle = pending.pop()
+            if bundle not in self.derivations or bundle in self.basis:
+                continue
+            for dependent in list(self.dependents.pop(bundle, ())):
+                if dependent in self.derivations and bundle in self.derivations[dependent][1]:
+                    pending.append(dependent)
+            for premise in self.derivations.pop(bundle)[1]:
+                self.dependents[premise].discard(bundle)
+            shape, twist = bundle
+            if shape in self.masks:
+                self.masks[shape] &= ~(1 << twist)
+            affected.add(shape)
+        return affected
+
+    def _producers(self, shapes: set) -> list:
+        """
+        the rules that can add twists to shapes
+        """
+        rules = [("staircase", t) for t in self.staircases if any(target in shapes for target in self._staircase_targets(t))]
+        return rules + [("symplectic",)]
+
+    def add(self, weights: list) -> bool:
+        """
+        add bundles to the basis and apply again the rules reading them.
+
+        Args:
+            weights: a list of weights of len 3 in format U^{w1,w2,w3}
+        Return:
+            boolean: is T generated by the new basis?
+        """
+        changed = set()
+        for shape, twists in convert(weights).items():
+            shape = tuple(int(i) for i in shape)
+            for twist in twists:
+                if self._add_bundle(shape, int(twist)):
+                    changed.add(shape)
+        new_shapes = self._close_shapes(list(changed))
+        rules = [("staircase", t) for t in new_shapes]
+        if len(new_shapes) != 0:
+            # the symplectic rule intersects over all the shapes with smaller column: with new shapes, 
+            # the previous derivations in the columns after them have to be checked again
+            first_column = min(self.column(shape) for shape in new_shapes)
+            stale = [bundle for bundle, (rule, _) in self.derivations.items() 
+                     if rule[0] == "symplectic" and rule[1] >= first_column]
+            changed |= self._invalidate(stale)
+            rules += self._producers(changed)
+        rules += [("staircase", t) for shape in changed for t in self.readers[shape]] + [("symplectic",)]
+        return self.run(rules)
+
+    def remove(self, weights: list) -> bool:
+        """
+        remove bundles from the basis, discard what was derived from them and derive it again if possible.
+
+        Args:
+            weights: a list of weights of len 3 in format U^{w1,w2,w3}
+        Return:
+            boolean: is T generated by the new basis?
+        """
+        removed = []
+        for shape, twists in convert(weights).items():
+            shape = tuple(int(i) for i in shape)
+            for twist in twists:
+                self.extraneous.discard((shape, int(twist)))
+                if (shape, int(twist)) in self.basis:
+                    self.basis.discard((shape, int(twist)))
+                    removed.append((shape, int(twist)))
+        affected = self._invalidate([bundle for bundle in removed if bundle in self.derivations])
+        for bundle in removed:
+            self.derivations.pop(bundle, None)
+            self.masks[bundle[0]] &= ~(1 << bundle[1])
+            affected.add(bundle[0])
+        # shapes that can no longer be reached from the basis are dropped
+        reachable = BitmaskFullness([], self.k, self.n)
+        reachable._close_shapes(list({shape for shape, _ in self.basis} | {shape for shape, _ in self.extraneous}))
+        dropped = set(self.masks) - set(reachable.masks)
+        affected |= self._invalidate([(shape, twist) for shape in dropped for twist in range(self.w+1) 
+                                      if self.masks[shape] >> twist & 1])
+        for shape in dropped:
+            del self.masks[shape]
+            self.staircases.pop(shape, None)
+        self.symplectic.remove_shapes(dropped)
+        for readers in self.readers.values():
+            readers -= dropped
+        affected -= dropped
+        return self.run(self._producers(affected))
+
+    def certificate(self) -> list:
+        """
+        derivation of the generated bundles as a proof certificate: every step only uses bundles of previous steps.
+
+        Return:
+            steps: a list of dictionaries with keys "bundle" (the weight U^{w1,w2,w3}), "rule" ("basis", "staircase" or 
+                "symplectic"), "premises" (list of weights), "staircase" and "twist" (the staircase complex used and its twist) 
+                or "column" (for the symplectic rule)
+        """
+        def weight(bundle):
+            (a, b), twist = bundle
+            return [a + twist, twist, b + twist]
+        steps = []
+        done = set()
+        for root in sorted(self.derivations):
+            stack = [(root, False)]
+            while stack:
+                bundle, expanded = stack.pop()
+                if bundle in done:
+                    continue
+                rule, premises = self.derivations[bundle]
+                if not expanded:
+                    stack.append((bundle, True))
+                    stack += [(premise, False) for premise in sorted(premises) if premise not in done]
+                    continue
+                done.add(bundle)
+                step = {"bundle": weight(bundle), "rule": rule[0], "premises": [weight(p) for p in sorted(premises)]}
+                if rule[0] == "staircase":
+                    step.update({"staircase": [rule[1][0], 0, rule[1][1]], "twist": rule[3]})
+                elif rule[0] == "symplectic":
+                    step.update({"column": rule[1]})
+                steps.append(step)
+        return steps
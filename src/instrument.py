@@ -0,0 +1,163 @@
+"""
+Instrumentation of the hot functions of the package.
+
+The functions decorated with instrumented are timed only inside a profiling block: 
+    with profiling() as report:
+        is_Lefschetz_basis(B, k, n)
+    print(report)
+Outside such a block the decorator has no cost: it returns the undecorated function, and profiling() 
+binds the timed wrappers in place of the functions (in the modules, and in the classes defining them) 
+only for the duration of the block. References kept elsewhere, e.g. in local variables, are not rebound.
+Generator functions are timed while they run, not while the caller consumes their values.
+With profiling(trace=True) every call is also recorded, with its stack of instrumented callers, 
+and report.collapsed() exports them in the collapsed-stack format read by flamegraph.pl and speedscope.
+Only the calls of the current process are seen: the workers of a process pool are not profiled.
+"""
+
+import contextlib
+import functools
+import inspect
+import sys
+import time
+from collections import defaultdict
+
+#the Report collecting the calls, None when the instrumentation is disabled
+_active = None
+#the instrumented functions, as pairs (function, timed wrapper)
+_registry = []
+
+class Report:
+    """
+    Calls and time of the instrumented functions during a profiling block.
+
+    Attributes:
+        stats: a dictionary {name: [calls, time, self time]}, time includes the nested instrumented calls, self time does not
+        trace: the list of calls (stack, start, duration, self time) if tracing, None otherwise; stack is a tuple of names
+    """
+    def __init__(self, trace: bool = False):
+        self.stats = defaultdict(lambda: [0, 0.0, 0.0])
+        self.trace = [] if trace else None
+        self._stack = []
+
+    def _enter(self, name: str):
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def _exit(self, call: bool = True):
+        name, start, nested = self._stack.pop()
+        duration = time.perf_counter() - start
+        stat = self.stats[name]
+        stat[0] += call
+        if all(frame[0] != name for frame in self._stack):
+            stat[1] += duration
+        stat[2] += duration - nested
+        if len(self._stack) != 0:
+            self._stack[-1][2] += duration
+        if self.trace is not None:
+            stack = tuple(frame[0] for frame in self._stack) + (name,)
+            self.trace.append((stack, start, duration, duration - nested))
+
+    def collapsed(self) -> str:
+        """
+        Return:
+            the traced calls in collapsed-stack format: one line "caller;...;function self-time" per stack, 
+            self time in microseconds
+        """
+        if self.trace is None:
+            raise Exception("The report has no trace, use profiling(trace=True)")
+        totals = defaultdict(float)
+        for stack, _, _, self_time in self.trace:
+            totals[stack] += self_time
+        return "\n".join(f"{';'.join(stack)} {round(total*1e6)}" for stack, total in sorted(totals.items()))
+
+    def write_collapsed(self, path: str):
+        with open(path, "w") as f:
+            f.write(self.collapsed() + "\n")
+
+    def __str__(self) -> str:
+        lines = [f"{'function':<36}{'calls':>10}{'time (s)':>12}{'self (s)':>12}"]
+        for name, (calls, total, self_time) in sorted(self.stats.items(), key=lambda item: -item[1][1]):
+            lines.append(f"{name:<36}{calls:>10}{total:>12.4f}{self_time:>12.4f}")
+        return "\n".join(lines)
+
+def instrumented(name: str = None):
+    """
+    decorator that counts the calls and the time of a function inside a profiling block
+
+    Args:
+        name: the name in the report, default the qualified name of the function
+    """
+    def decorator(func):
+        label = func.__qualname__ if name is None else name
+        if inspect.isgeneratorfunction(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                report = _active
+                if report is None:
+                    return (yield from func(*args, **kwargs))
+                generator = func(*args, **kwargs)
+                first = True
+                while True:
+                    # time every resumption of the generator, counting them as a single call
+                    report._enter(label)
+                    try:
+                        value = next(generator)
+                    except StopIteration as stop:
+                        return stop.value
+                    finally:
+                        report._exit(first)
+                        first = False
+                    yield value
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                report = _active
+                if report is None:
+                    return func(*args, **kwargs)
+                report._enter(label)
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    report._exit()
+        _registry.append((func, wrapper))
+        return func if _active is None else wrapper
+    return decorator
+
+def _bind(timed: bool):
+    """
+    replace the instrumented functions by their timed wrappers (timed=True) or the other way round, 
+    in the namespaces of the loaded modules and of the classes they define
+    """
+    swap = {}
+    for func, wrapper in _registry:
+        old, new = (func, wrapper) if timed else (wrapper, func)
+        swap[id(old)] = (old, new)
+    for module in list(sys.modules.values()):
+        namespace = getattr(module, "__dict__", None)
+        if not isinstance(namespace, dict):
+            continue
+        for key, value in list(namespace.items()):
+            if id(value) in swap and swap[id(value)][0] is value:
+                namespace[key] = swap[id(value)][1]
+            elif isinstance(value, type) and getattr(value, "__module__", None) == module.__name__:
+                for attribute, member in list(value.__dict__.items()):
+                    if id(member) in swap and swap[id(member)][0] is member:
+                        setattr(value, attribute, swap[id(member)][1])
+
+@contextlib.contextmanager
+def profiling(trace: bool = False):
+    """
+    context manager that enables the instrumentation and yields the Report of the block. 
+    A nested profiling block collects its own report, the outer one misses its calls.
+    """
+    global _active
+    previous = _active
+    report = Report(trace)
+    if previous is None:
+        _bind(True)
+    _active = report
+    try:
+        yield report
+    finally:
+        _active = previous
+        if previous is None:
+            _bind(False)
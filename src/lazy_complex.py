@@ -0,0 +1,214 @@
+"""
+This module contains a lazy layer over complex and truncated_complex.
+
+Objects:
+    lazy_complex: a node of an expression DAG built with +, *, shift, dual and cone;
+        it is evaluated to a complex only when its entries, amplitude or cohomology are requested
+    lazy_truncated_complex: a pair of lazy_complex, the lazy version of truncated_complex
+
+The nodes are hash-consed: building twice the same expression returns the same node, so the value of a node,
+its dual and its non-acyclic part are computed once and shared by all the expressions containing it.
+The lazy_truncated_complex are hash-consed on their two nodes, so their shortest_Tor cache is shared too.
+The table keeps the LAZY_NODES_SIZE most recently used nodes: an evicted node stays valid, 
+it is only not shared with the expressions built after its eviction.
+Duals are pushed down to the leaves: dual(a + b) = dual(a) + dual(b), dual(a[i]) = dual(a)[-i], dual(a * b) = dual(a) * dual(b).
+
+Functions:
+    lazy: wrap a complex or a truncated_complex
+    clear_lazy_nodes: forget all the nodes and their cached values
+"""
+
+from collections import OrderedDict
+
+from src.complex import complex, truncated_complex, _complex_key, _freeze, _thaw
+
+#hash-consing table {key: node}, least recently used first
+_nodes = OrderedDict()
+LAZY_NODES_SIZE = 2**14
+
+def _intern(key: tuple, make):
+    """
+    the node of the table with this key, created by make() if there is none
+    """
+    node = _nodes.get(key)
+    if node is not None:
+        _nodes.move_to_end(key)
+        return node
+    node = make()
+    _nodes[key] = node
+    if len(_nodes) > LAZY_NODES_SIZE:
+        _nodes.popitem(last=False)
+    return node
+
+def _node(op: str, children: tuple, param, build):
+    key = (op, tuple(child.id for child in children), param)
+    return _intern(key, lambda: lazy_complex(op, children, param, build))
+
+def _truncated(right, left):
+    return _intern(("truncated", (right.id, left.id), None), lambda: lazy_truncated_complex(right, left))
+
+def clear_lazy_nodes():
+    """
+    forget all the nodes and their cached values, the existing nodes stay valid but are not shared anymore
+    """
+    _nodes.clear()
+
+class lazy_complex:
+    """
+    A node of the expression DAG of a complex.
+
+    Attributes:
+        id: an integer identifying the node
+        op: "leaf", "sum", "shift" or "tensor" (duals are pushed down to the leaves)
+        children: the nodes the operation is applied to
+        param: the complex for a leaf, the index for a shift, None otherwise
+    """
+    _count = 0
+
+    def __init__(self, op: str, children: tuple, param, build):
+        """
+        Constructor for lazy_complex, use lazy and the operations instead.
+        """
+        self.id = lazy_complex._count
+        lazy_complex._count += 1
+        self.op = op
+        self.children = children
+        self.param = param
+        self._build = build
+        self._value = None
+        self._dual = None
+        self._non_vanish = {}
+        self._truncations = {}
+
+    @staticmethod
+    def leaf(cpx: complex):
+        """
+        node of a complex, the same node for complexes with the same entries in the same degrees (empty ones included)
+        """
+        # the empty degrees are part of the key, as they change stupid_truncation
+        key = ("leaf", (), (_complex_key(cpx), tuple(sorted(cpx.degrees))))
+        return _intern(key, lambda: lazy_complex("leaf", (), cpx, lambda: cpx))
+
+    @property
+    def value(self) -> complex:
+        """
+        the complex of the node, computed once. It is shared, it should not be modified.
+        """
+        if self._value is None:
+            self._value = self._build()
+            self._build = None
+        return self._value
+
+    def __add__(self, second_term):
+        first, second = sorted([self, second_term], key=lambda node: node.id)
+        return _node("sum", (first, second), None, lambda: first.value + second.value)
+
+    def __mul__(self, second_complex):
+        first, second = sorted([self, second_complex], key=lambda node: node.id)
+        return _node("tensor", (first, second), None, lambda: first.value * second.value)
+
+    def shift(self, index: int):
+        if index == 0:
+            return self
+        if self.op == "shift":
+            return self.children[0].shift(self.param + index)
+        return _node("shift", (self,), index, lambda: self.value.shift(index))
+
+    def cone(self, second_term):
+        """
+        cone of a morphism, as complex.cone
+        """
+        return self + second_term.shift(1)
+
+    def dual(self):
+        """
+        dual complex, pushed down to the leaves and cached
+        """
+        if self._dual is None:
+            if self.op == "leaf":
+                dual = lazy_complex.leaf(self.param.dual())
+            elif self.op == "sum":
+                dual = self.children[0].dual() + self.children[1].dual()
+            elif self.op == "shift":
+                dual = self.children[0].dual().shift(-self.param)
+            else:
+                dual = self.children[0].dual() * self.children[1].dual()
+            self._dual = dual
+            dual._dual = self
+        return self._dual
+
+    def amplitude(self) -> int:
+        return self.value.amplitude()
+
+    def non_vanish_terms(self, k: int, n: int) -> complex:
+        """
+        non-acyclic part of the complex, as complex.non_vanish_terms, cached per (k, n)
+        """
+        if (k, n) not in self._non_vanish:
+            self._non_vanish[(k, n)] = self.value.non_vanish_terms(k, n)
+        return self._non_vanish[(k, n)]
+
+    def stupid_truncation(self, rel_cutting_point: int):
+        """
+        stupid truncation of the complex, as complex.stupid_truncation, as a lazy_truncated_complex
+        """
+        if rel_cutting_point not in self._truncations:
+            self._truncations[rel_cutting_point] = lazy(self.value.stupid_truncation(rel_cutting_point))
+        return self._truncations[rel_cutting_point]
+
+    def __str__(self) -> str:
+        return str(self.value)
+
+class lazy_truncated_complex:
+    """
+    lazy version of truncated_complex, evaluated only by is_indep, iter_problems, shortest_Tor and str.
+    Use lazy and the operations to build it, the same object is returned for the same pair of nodes.
+
+    Attributes:
+        right: right resolution, a lazy_complex
+        left: left resolution, a lazy_complex
+    """
+    def __init__(self, right: lazy_complex, left: lazy_complex):
+        self.right = right
+        self.left = left
+        self._shortest_Tor = {}
+
+    def dual(self):
+        return _truncated(self.left.dual(), self.right.dual())
+
+    def cone(self, second_trunc_cpx):
+        return _truncated(self.right.cone(second_trunc_cpx.right), self.left.cone(second_trunc_cpx.left))
+
+    def evaluate(self) -> truncated_complex:
+        return truncated_complex(self.right.value, self.left.value)
+
+    def shortest_Tor(self, second_trunc_cpx, k: int, n: int) -> complex:
+        """
+        truncated_complex.shortest_Tor, cached on the nodes of the two objects. Every call returns a new complex.
+        """
+        if isinstance(second_trunc_cpx, truncated_complex):
+            second_trunc_cpx = lazy(second_trunc_cpx)
+        key = (second_trunc_cpx.right.id, second_trunc_cpx.left.id, k, n)
+        if key not in self._shortest_Tor:
+            self._shortest_Tor[key] = _freeze(self.evaluate().shortest_Tor(second_trunc_cpx.evaluate(), k, n))
+        return _thaw(self._shortest_Tor[key])
+
+    def iter_problems(self, weights: list, k: int, n: int):
+        return self.evaluate().iter_problems(weights, k, n)
+
+    def is_indep(self, weights: list, k: int, n: int, verbose=False) -> bool:
+        return self.evaluate().is_indep(weights, k, n, verbose)
+
+    def __str__(self) -> str:
+        return str(self.evaluate())
+
+def lazy(obj):
+    """
+    Args:
+        obj: a complex or a truncated_complex
+    Return:
+        the corresponding lazy_complex or lazy_truncated_complex
+    """
+    if isinstance(obj, truncated_complex):
+        return _truncated(lazy_complex.leaf(obj.right), lazy_complex.leaf(obj.left))
+    return lazy_complex.leaf(obj)
@@ -0,0 +1,142 @@
+"""
+This module contains a pure Python/NumPy implementation of the Littlewood-Richardson rule, 
+used by utilities.LRfactors as an alternative backend to Sage's lrcalc.
+
+For at most 3 rows (the case IGr(3, 2n+1)) an LR tableau of shape nu/lambda and content mu is determined 
+by the number x of 1's in its second row, so c^nu_{lambda, mu} is the length of an interval of admissible x. 
+This makes the computation a handful of array operations, evaluated for many pairs at once.
+For more rows we fall back to the enumeration of LR tableaux, adding one letter at a time.
+
+Functions:
+    mult: same interface as lrcalc.mult
+    mult_batch: products of many pairs of partitions at once
+    compare_with_lrcalc: validation of the backend against lrcalc on a box of partitions
+"""
+
+import numpy as np
+import itertools
+from collections import Counter
+
+def mult(outer, inner, maxrows: int) -> dict:
+    """
+    computes the product of Schur functions s_outer * s_inner in maxrows variables.
+
+    Args:
+        outer, inner: two partitions, any list-like data type of non-negative decreasing integers
+        maxrows: maximal number of rows of the factors (k in IGr(k, 2n+1))
+    Returns:
+        a dictionary {partition: multiplicity}, where partitions are tuples of length maxrows
+    """
+    return mult_batch([(outer, inner)], maxrows)[0]
+
+def mult_batch(pairs: list, maxrows: int) -> list:
+    """
+    computes the products of Schur functions of many pairs of partitions.
+
+    Args:
+        pairs: a list of pairs of partitions
+        maxrows: maximal number of rows of the factors (k in IGr(k, 2n+1))
+    Returns:
+        a list of dictionaries {partition: multiplicity}, one for each pair
+    """
+    if len(pairs) == 0:
+        return []
+    if maxrows <= 3:
+        return _mult_rank3(pairs, maxrows)
+    return [_mult_generic(_pad(outer, maxrows), _pad(inner, maxrows), maxrows) for outer, inner in pairs]
+
+def _pad(partition, length: int) -> list:
+    partition = [int(i) for i in partition]
+    if len(partition) > length or any(i < 0 for i in partition) or partition != sorted(partition, reverse=True):
+        raise Exception("A partition should be decreasing, non-negative, with at most maxrows entries")
+    return partition + [0]*(length - len(partition))
+
+def _mult_rank3(pairs: list, maxrows: int) -> list:
+    """
+    vectorized LR rule for at most 3 rows. The rows of an LR tableau of shape nu/lam and content mu contain 
+    (a11), (a21, a22), (a31, a32, a33) letters 1, 2, 3: once nu is fixed, everything is determined by x = a21.
+    """
+    lam = np.array([_pad(outer, 3) for outer, _ in pairs], dtype=np.int64)
+    mu = np.array([_pad(inner, 3) for _, inner in pairs], dtype=np.int64)
+    # candidate nu: nu1 - lam1 and nu2 - lam2 range in [0, mu1], nu3 is fixed by the size
+    offsets = np.arange(int(mu[:, 0].max()) + 1)
+    off1, off2 = (o.ravel() for o in np.meshgrid(offsets, offsets, indexing='ij'))
+    lam1, lam2, lam3 = (lam[:, [r]] for r in range(3))
+    mu1, mu2, mu3 = (mu[:, [r]] for r in range(3))
+    nu1 = lam1 + off1
+    nu2 = lam2 + off2
+    nu3 = lam.sum(axis=1, keepdims=True) + mu.sum(axis=1, keepdims=True) - nu1 - nu2
+    a11 = nu1 - lam1
+    d2 = nu2 - lam2
+    lower = np.maximum.reduce([np.zeros_like(nu1), d2 - mu2, d2 - a11, mu2 - a11, 
+                               mu1 - a11 - lam2 + lam3, lam3 + mu1 + mu2 - a11 - nu2])
+    upper = np.minimum.reduce([d2, mu1 - a11, d2 - mu3, np.broadcast_to(lam1 - lam2, nu1.shape)])
+    coeffs = np.clip(upper - lower + 1, 0, None)
+    coeffs[(nu2 > nu1) | (nu3 > nu2) | (nu3 < lam3)] = 0
+    if maxrows < 3:
+        coeffs[nu3 != 0] = 0
+        if maxrows < 2:
+            coeffs[nu2 != 0] = 0
+    products = []
+    nu = np.stack([nu1, nu2, nu3], axis=-1)
+    for row in range(len(pairs)):
+        support = np.nonzero(coeffs[row])[0]
+        products.append({tuple(int(i) for i in nu[row, s, :maxrows]): int(coeffs[row, s]) for s in support})
+    return products
+
+def _mult_generic(lam: list, mu: list, maxrows: int) -> dict:
+    """
+    LR rule for any number of rows: the letters i = 1, 2, ... are added as horizontal strips, 
+    keeping the reading word of the tableau a lattice word.
+    """
+    product = Counter()
+    def add_letter(letter, shape, previous_counts):
+        if letter == len(mu) or mu[letter] == 0:
+            product[tuple(shape)] += 1
+            return
+        for counts in _strips(shape, mu[letter], previous_counts, letter > 0):
+            add_letter(letter + 1, [shape[r] + counts[r] for r in range(maxrows)], counts)
+    add_letter(0, list(lam), [0]*maxrows)
+    return dict(product)
+
+def _strips(shape: list, size: int, previous_counts: list, lattice: bool):
+    """
+    yields the ways of distributing size boxes in the rows of shape as a horizontal strip, 
+    such that the letters placed up to row r do not exceed the previous letter placed up to row r-1
+    """
+    rows = len(shape)
+    def distribute(r, left, placed, placed_previous, counts):
+        if r == rows:
+            if left == 0:
+                yield list(counts)
+            return
+        bound = left if r == 0 else min(left, shape[r-1] - shape[r])
+        if lattice:
+            bound = min(bound, placed_previous - placed)
+        for c in range(bound, -1, -1):
+            counts.append(c)
+            yield from distribute(r + 1, left - c, placed + c, placed_previous + previous_counts[r], counts)
+            counts.pop()
+    yield from distribute(0, size, 0, 0, [])
+
+def compare_with_lrcalc(bound: int, maxrows: int = 3) -> list:
+    """
+    compare this backend with Sage's lrcalc on all pairs of partitions with entries at most bound.
+    Requires Sage.
+
+    Args:
+        bound: maximal entry of the partitions to test
+        maxrows: number of rows
+    Returns:
+        mismatches: a list of the pairs of partitions where the two backends disagree
+    """
+    import sage.libs.lrcalc.lrcalc as lrcalc
+    partitions = [p for p in itertools.product(range(bound, -1, -1), repeat=maxrows) if list(p) == sorted(p, reverse=True)]
+    pairs = list(itertools.product(partitions, repeat=2))
+    mismatches = []
+    for pair, product in zip(pairs, mult_batch(pairs, maxrows)):
+        expected = lrcalc.mult(list(pair[0]), list(pair[1]), maxrows)
+        expected = {tuple(list(p) + [0]*(maxrows - len(p))): int(c) for p, c in expected.items()}
+        if expected != product:
+            mismatches.append(pair)
+    return mismatches
@@ -0,0 +1,222 @@
+"""
+Command-line batch runner for verification jobs, run from the root of the repository with
+    python -m src.runner jobs.json --workers 4 --output results.json
+
+The job file (JSON, or YAML if PyYAML is installed) contains default values of k and n and a list of jobs:
+    {"k": 3, "n": 5, "jobs": [
+        {"name": "B1", "type": "lefschetz", "basis": [[0,0,-3], ...]},
+        {"name": "H", "type": "is_indep", "object": {"cone": [{"staircase": [2,0,-2], "truncation": 3},
+                                                             {"staircase": [3,0,-1], "truncation": 4},
+                                                             {"staircase": [4,0,0], "truncation": 5}]},
+         "weights": [[0,0,-3], ...], "twists": [0, 1]},
+        {"name": "Tor", "type": "shortest_Tor", "object": {"staircase": [4,0,0], "truncation": 5},
+         "second": {"staircase": [3,0,-1], "truncation": 4}},
+        {"name": "B full", "type": "fullness", "basis": [[0,0,-3], ...], "extra": [[5,2,0]]}
+    ]}
+Every job can override k and n. The jobs are:
+    lefschetz: is_Lefschetz_basis on basis, with the first max_violations (default 10) violations;
+        euler_precheck: true runs the Euler form precheck first
+    is_indep: is_indep of the object with the weights twisted by every twist (default [0]), one sub-job per twist;
+        an object is {"staircase": weight, "truncation": r} (staircase(weight, k, 2n+1).stupid_truncation(r))
+        or {"cone": [a, b, c, ...]}, that is a.cone(b.cone(c.cone(...))) as in the notebook
+    shortest_Tor: object.shortest_Tor(second.dual(), k, n)
+    fullness: fullness test of the twists by 0,...,2n+1-k of basis (unless "twisted": false) plus the weights in extra;
+        "method": "bitmask" (default) or "iterative" for fullness.fullness_test
+
+Finished sub-jobs are appended to a checkpoint file (default <job file>.checkpoint),
+so an interrupted run skips them when it is started again. Every record carries a hash of the job (with its 
+default values filled in): the records of a job that was edited since are not reused.
+The modules of the package are imported only by the workers that need them.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+def load_jobs(path: str) -> dict:
+    """
+    read a job file, YAML if the extension is .yaml or .yml and JSON otherwise
+    """
+    with open(path) as f:
+        if path.endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError:
+                raise Exception("Reading YAML job files requires PyYAML, use a JSON job file")
+            return yaml.safe_load(f)
+        return json.load(f)
+
+def subjobs(job: dict) -> list:
+    """
+    keys of the sub-jobs of a job, each one is checkpointed separately
+    """
+    if job["type"] == "is_indep":
+        return [f"twist {twist}" for twist in job.get("twists", [0])]
+    if job["type"] in ("lefschetz", "shortest_Tor", "fullness"):
+        return [job["type"]]
+    raise Exception(f"Unknown job type {job['type']}")
+
+def _build_object(spec: dict, k: int, n: int):
+    from src.complex import staircase
+    if "cone" in spec:
+        parts = [_build_object(part, k, n) for part in spec["cone"]]
+        obj = parts[-1]
+        for part in parts[-2::-1]:
+            obj = part.cone(obj)
+        return obj
+    return staircase(spec["staircase"], k, 2*n+1).stupid_truncation(spec["truncation"])
+
+def _counter(counter) -> list:
+    return [[list(weight), int(multip)] for weight, multip in counter.items()]
+
+def run_subjob(job: dict, sub: str):
+    """
+    run a sub-job in the current process
+
+    Return:
+        a JSON-serializable result
+    """
+    k, n = job["k"], job["n"]
+    if job["type"] == "lefschetz":
+        from src.vanishing_odd import iter_Lefschetz_violations
+        if job.get("euler_precheck", False):
+            from src.euler import Euler_precheck
+            if not Euler_precheck(job["basis"], k, n)[0]:
+                return {"basis": False, "euler_precheck": False, "violations": []}
+        violations, seen = [], False
+        for violation in iter_Lefschetz_violations(job["basis"], k, n):
+            seen = True
+            if len(violations) == job.get("max_violations", 10):
+                break
+            if violation["kind"] == "not_exceptional":
+                violations.append({"kind": violation["kind"], "weight": list(violation["weight"]),
+                                   "nonvanish": {str(l): _counter(c) for l, c in violation["nonvanish"].items()}})
+            else:
+                violations.append({"kind": violation["kind"], "weights": [list(w) for w in violation["weights"]],
+                                   "twist": violation["twist"], "nonvanish": _counter(violation["nonvanish"])})
+        return {"basis": not seen, "violations": violations}
+    if job["type"] == "is_indep":
+        twist = int(sub.split()[1])
+        obj = _build_object(job["object"], k, n)
+        weights = [[entry + twist for entry in weight] for weight in job["weights"]]
+        problems = [{"weight": list(problem["weight"]), "cohomology": str(problem["cohomology"])}
+                    for problem in obj.iter_problems(weights, k, n)]
+        return {"indep": len(problems) == 0, "problems": problems}
+    if job["type"] == "shortest_Tor":
+        cohom = _build_object(job["object"], k, n).shortest_Tor(_build_object(job["second"], k, n).dual(), k, n)
+        return {"amplitude": cohom.amplitude(), "complex": str(cohom)}
+    basis = [list(weight) for weight in job["basis"]]
+    if job.get("twisted", True):
+        basis = [[entry + twist for entry in weight] for twist in range(2*n+2-k) for weight in job["basis"]]
+    basis += [list(weight) for weight in job.get("extra", [])]
+    if job.get("method", "bitmask") == "iterative":
+        from src.fullness import fullness_test
+        return {"full": fullness_test(basis, k, n)}
+    from src.fullness_bitmask import fullness_test_bitmask
+    return {"full": fullness_test_bitmask(basis, k, n)}
+
+def job_hash(job: dict) -> str:
+    """
+    hash of the normalized job (JSON with sorted keys), stored in the checkpoint records
+    """
+    return hashlib.sha256(json.dumps(job, sort_keys=True).encode()).hexdigest()[:16]
+
+def read_checkpoint(path: str) -> dict:
+    """
+    Return:
+        the finished sub-jobs {(job name, sub-job): (job hash, result)} recorded in the checkpoint file
+    """
+    done = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # a line cut by an interruption
+                    continue
+                done[(record["job"], record["sub"])] = (record.get("hash"), record["result"])
+    return done
+
+def run(jobs_file: dict, workers: int = 1, checkpoint: str = None) -> dict:
+    """
+    run all the sub-jobs of a job file not already in the checkpoint
+
+    Return:
+        results: {"jobs": [{"name", "type", "k", "n", "ok", "results": {sub-job: result}}]}
+    """
+    jobs = []
+    for index, job in enumerate(jobs_file["jobs"]):
+        job = dict(job)
+        job.setdefault("name", f"job {index}")
+        job.setdefault("k", jobs_file.get("k", 3))
+        job.setdefault("n", jobs_file.get("n"))
+        if job["n"] is None:
+            raise Exception(f"The job {job['name']} has no n")
+        jobs.append(job)
+    if len({job["name"] for job in jobs}) != len(jobs):
+        raise Exception("The names of the jobs should be different")
+    hashes = {job["name"]: job_hash(job) for job in jobs}
+    recorded = read_checkpoint(checkpoint) if checkpoint is not None else {}
+    # the records of jobs edited since they were written are ignored
+    done = {key: result for key, (spec, result) in recorded.items() if hashes.get(key[0]) == spec}
+    todo = [(job, sub) for job in jobs for sub in subjobs(job) if (job["name"], sub) not in done]
+    log = None
+    if checkpoint is not None:
+        log = open(checkpoint, "a+")
+        if log.tell() > 0:
+            log.seek(log.tell() - 1)
+            if log.read(1) != "\n":
+                # end the line cut by an interruption
+                log.write("\n")
+
+    def record(job, sub, result):
+        done[(job["name"], sub)] = result
+        print(f"{job['name']}: {sub} done", file=sys.stderr, flush=True)
+        if log is not None:
+            log.write(json.dumps({"job": job["name"], "sub": sub, "hash": hashes[job["name"]], "result": result}) + "\n")
+            log.flush()
+
+    try:
+        if workers == 1:
+            for job, sub in todo:
+                record(job, sub, run_subjob(job, sub))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {executor.submit(run_subjob, job, sub): (job, sub) for job, sub in todo}
+                for future in as_completed(futures):
+                    record(*futures[future], future.result())
+    finally:
+        if log is not None:
+            log.close()
+    results = []
+    for job in jobs:
+        sub_results = {sub: done[(job["name"], sub)] for sub in subjobs(job)}
+        flags = [result.get("basis", result.get("indep", result.get("full", True))) for result in sub_results.values()]
+        results.append({"name": job["name"], "type": job["type"], "k": job["k"], "n": job["n"],
+                        "ok": all(flags), "results": sub_results})
+    return {"jobs": results}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run verification jobs on odd isotropic Grassmannians")
+    parser.add_argument("jobs", help="JSON or YAML job file")
+    parser.add_argument("--workers", type=int, default=1, help="number of processes")
+    parser.add_argument("--checkpoint", help="checkpoint file, default <jobs>.checkpoint")
+    parser.add_argument("--no-checkpoint", action="store_true", help="do not read or write a checkpoint")
+    parser.add_argument("--output", help="JSON file for the results, default standard output")
+    args = parser.parse_args(argv)
+    checkpoint = None if args.no_checkpoint else (args.checkpoint or args.jobs + ".checkpoint")
+    results = run(load_jobs(args.jobs), args.workers, checkpoint)
+    if args.output is None:
+        json.dump(results, sys.stdout, indent=1)
+        print()
+    else:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=1)
+    return 0 if all(job["ok"] for job in results["jobs"]) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
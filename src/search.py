@@ -0,0 +1,248 @@
+"""
+This module searches Lefschetz bases on IGr(k, 2n+1) among a pool of candidate weights.
+
+The search runs in three steps:
+    - the compatibility graph: which candidates are Lefschetz exceptional and, for every pair, 
+      if one can precede the other (Ext(U_second(l), U_first) = 0 for l=0,...,2n+1-k, as in is_Lefschetz_basis);
+    - the enumeration of the maximal admissible collections, i.e. maximal sets of exceptional candidates 
+      that can be ordered so that every pair is compatible. It is split in branches by the first candidate of the set. 
+      If the pool is closed under duality (up to a global twist), a branch only enumerates the collections 
+      whose dual is not found in an earlier branch; the remaining twisted copies are discarded by canonical_form;
+    - the fullness test of the twists of the surviving collections (fullness_bitmask).
+Branches and fullness tests run on a process pool and their results are written to a checkpoint file, 
+so an interrupted search can be resumed.
+"""
+
+import json
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+from src.utilities import weight_array
+from src.vanishing_odd import Lefschetz_tasks
+from src.fullness_bitmask import fullness_test_bitmask
+
+def compatibility_graph(candidates: list, k: int, n: int, workers: int = 1, chunksize: int = 32):
+    """
+    Args:
+        candidates: a list of weights
+        k, n: fix IGr(k,2n+1)
+        workers: number of processes
+    Returns:
+        exceptional: a boolean array, True for the Lefschetz exceptional candidates
+        precedes: a boolean matrix, precedes[i, j] is True if candidates[i] can come before candidates[j] in a Lefschetz basis
+    """
+    sequence = tuple(tuple(int(i) for i in weight_array(weight, k)) for weight in candidates)
+    tasks = [("excep", i) for i in range(len(sequence))]
+    tasks += [("pair", j, i) for i in range(len(sequence)) for j in range(len(sequence)) if i != j]
+    chunks = [tasks[i:i+chunksize] for i in range(0, len(tasks), chunksize)]
+    if workers == 1:
+        results = [Lefschetz_tasks(sequence, chunk, k, n) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(Lefschetz_tasks, [sequence]*len(chunks), chunks, [k]*len(chunks), [n]*len(chunks)))
+    exceptional = np.zeros(len(sequence), dtype=bool)
+    precedes = np.zeros((len(sequence), len(sequence)), dtype=bool)
+    for task, result, _ in (item for chunk in results for item in chunk):
+        if task[0] == "excep":
+            exceptional[task[1]] = result
+        else:
+            precedes[task[2], task[1]] = all(result.values())
+    return exceptional, precedes
+
+def _can_add(collection: list, candidate: int, precedes: np.array) -> bool:
+    """
+    can candidate be added to collection, keeping an order where every pair is compatible?
+    """
+    for element in collection:
+        if not (precedes[element, candidate] or precedes[candidate, element]):
+            return False
+    return _order(collection + [candidate], precedes) is not None
+
+def _order(collection: list, precedes: np.array):
+    """
+    an order of collection where every pair is compatible, None if there is none. 
+    Pairs compatible in one direction only force the order, so we look for a topological order 
+    of these forced edges, breaking ties with the index of the candidates.
+    """
+    before = {i: {j for j in collection if j != i and precedes[j, i] and not precedes[i, j]} for i in collection}
+    ordered = []
+    while len(ordered) < len(collection):
+        free = [i for i in collection if i not in ordered and before[i].issubset(ordered)]
+        if len(free) == 0:
+            return None
+        ordered.append(min(free))
+    return ordered
+
+def dual_permutation(candidates: list, k: int):
+    """
+    The Ext groups and exceptionality are invariant under duality, U^{w1,...,wk} -> U^{-wk,...,-w1}, 
+    which reverses the order of the collections, and under a global twist. 
+    A finite pool is never closed under a twist, but it can be closed under duality followed by a twist.
+
+    Return:
+        dual: a list with dual[i] the index of the candidate dual to candidates[i] (up to the twist), 
+            None if the pool is not closed under duality up to a twist
+    """
+    weights = [tuple(int(i) for i in weight_array(weight, k)) for weight in candidates]
+    if len(weights) == 0:
+        return None
+    duals = [tuple(-i for i in weight[::-1]) for weight in weights]
+    twist = min(weight[-1] for weight in weights) - min(weight[-1] for weight in duals)
+    index = {weight: i for i, weight in enumerate(weights)}
+    dual = [index.get(tuple(i + twist for i in weight)) for weight in duals]
+    if None in dual:
+        return None
+    return dual
+
+def _search_branch(first: int, exceptional: np.array, precedes: np.array, min_size: int, dual: list = None) -> list:
+    """
+    maximal admissible collections whose smallest candidate is first, as ordered lists of indices.
+
+    With dual (see dual_permutation), the candidates whose dual comes before first are not added: a collection 
+    containing one of them has its dual, which is also maximal admissible, in an earlier branch. 
+    The branch is empty if the dual of first comes before first.
+    """
+    found = []
+    admissible = [i for i in range(len(exceptional)) if exceptional[i]]
+    later = [i for i in admissible if i > first]
+    if dual is not None:
+        if dual[first] < first:
+            return found
+        later = [i for i in later if dual[i] >= first]
+    def extend(collection, position):
+        addable = [c for c in later[position:] if _can_add(collection, c, precedes)]
+        if len(collection) + len(addable) < min_size:
+            return
+        if len(addable) == 0:
+            # maximality: no candidate at all, including the ones before first, can be added
+            if not any(_can_add(collection, c, precedes) for c in admissible if c not in collection):
+                found.append(_order(collection, precedes))
+            return
+        candidate = addable[0]
+        index = later.index(candidate)
+        extend(collection + [candidate], index + 1)
+        extend(collection, index + 1)
+    if exceptional[first]:
+        extend([first], 0)
+    return found
+
+def canonical_form(collection: list, k: int) -> tuple:
+    """
+    representative of a collection up to a global twist and up to duality (reversing the order), 
+    used to keep only one collection per symmetry class.
+    """
+    def normalized(weights):
+        twist = min(weight[-1] for weight in weights)
+        return tuple(sorted(tuple(int(i) - twist for i in weight) for weight in weights))
+    weights = [weight_array(weight, k) for weight in collection]
+    return min(normalized(weights), normalized([-weight[::-1] for weight in weights]))
+
+def _twisted_basis(collection: list, k: int, n: int) -> list:
+    return [list(np.array(weight) + twist) for twist in range(2*n+2-k) for weight in collection]
+
+def _fullness_job(collection: list, k: int, n: int) -> bool:
+    return fullness_test_bitmask(_twisted_basis(collection, k, n), k, n)
+
+class LefschetzSearch:
+    """
+    Search of Lefschetz bases among a pool of candidates, with checkpoints.
+
+    Attributes:
+        candidates: the candidate weights, as tuples
+        k, n: fix IGr(k,2n+1)
+        workers: number of processes
+        checkpoint: path of the JSON checkpoint file, None to disable checkpoints
+        min_size: collections smaller than min_size are pruned
+        state: dictionary with the results computed so far, the content of the checkpoint
+    """
+    def __init__(self, candidates: list, k: int, n: int, workers: int = 1, checkpoint: str = None, min_size: int = 1):
+        self.candidates = [tuple(int(i) for i in weight_array(weight, k)) for weight in candidates]
+        self.k = k
+        self.n = n
+        self.workers = workers
+        self.checkpoint = checkpoint
+        self.min_size = min_size
+        self.state = {"k": k, "n": n, "candidates": [list(c) for c in self.candidates], "min_size": min_size, 
+                      "exceptional": None, "precedes": None, "branches": {}, "fullness": {}}
+        if checkpoint is not None and os.path.exists(checkpoint):
+            with open(checkpoint) as f:
+                saved = json.load(f)
+            if any(saved[key] != self.state[key] for key in ("k", "n", "candidates", "min_size")):
+                raise Exception(f"The checkpoint {checkpoint} belongs to a different search")
+            self.state = saved
+
+    def _save(self):
+        if self.checkpoint is None:
+            return
+        with open(self.checkpoint + ".tmp", "w") as f:
+            json.dump(self.state, f)
+        os.replace(self.checkpoint + ".tmp", self.checkpoint)
+
+    def graph(self):
+        """
+        Return:
+            exceptional, precedes: as in compatibility_graph, computed once
+        """
+        if self.state["precedes"] is None:
+            exceptional, precedes = compatibility_graph(self.candidates, self.k, self.n, self.workers)
+            self.state["exceptional"] = exceptional.tolist()
+            self.state["precedes"] = precedes.tolist()
+            self._save()
+        return np.array(self.state["exceptional"], dtype=bool), np.array(self.state["precedes"], dtype=bool)
+
+    def collections(self) -> list:
+        """
+        Return:
+            the maximal admissible collections, one for each class up to twist and duality, as ordered lists of weights
+        """
+        exceptional, precedes = self.graph()
+        dual = dual_permutation(self.candidates, self.k)
+        todo = [first for first in range(len(self.candidates)) if str(first) not in self.state["branches"]]
+        if self.workers == 1:
+            for first in todo:
+                self.state["branches"][str(first)] = _search_branch(first, exceptional, precedes, self.min_size, dual)
+                self._save()
+        elif len(todo) != 0:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                futures = {first: executor.submit(_search_branch, first, exceptional, precedes, self.min_size, dual) for first in todo}
+                for first, future in futures.items():
+                    self.state["branches"][str(first)] = future.result()
+                    self._save()
+        collections = {}
+        for first in range(len(self.candidates)):
+            for indices in self.state["branches"][str(first)]:
+                collection = [list(self.candidates[i]) for i in indices]
+                collections.setdefault(canonical_form(collection, self.k), collection)
+        return list(collections.values())
+
+    def run(self) -> list:
+        """
+        enumerate the maximal admissible collections and test their fullness.
+
+        Return:
+            results: a list of dictionaries {"collection": ordered list of weights, "full": bool}
+        """
+        collections = self.collections()
+        todo = [c for c in collections if json.dumps(c) not in self.state["fullness"]]
+        if self.workers == 1:
+            for collection in todo:
+                self.state["fullness"][json.dumps(collection)] = _fullness_job(collection, self.k, self.n)
+                self._save()
+        elif len(todo) != 0:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                futures = [executor.submit(_fullness_job, collection, self.k, self.n) for collection in todo]
+                for collection, future in zip(todo, futures):
+                    self.state["fullness"][json.dumps(collection)] = future.result()
+                    self._save()
+        return [{"collection": c, "full": self.state["fullness"][json.dumps(c)]} for c in collections]
+
+def search_Lefschetz_bases(candidates: list, k: int, n: int, workers: int = 1, checkpoint: str = None, min_size: int = 1) -> list:
+    """
+    Search Lefschetz bases among candidates, see LefschetzSearch.
+
+    Returns:
+        results: a list of dictionaries {"collection": ordered list of weights, "full": bool}, full collections first
+    """
+    results = LefschetzSearch(candidates, k, n, workers, checkpoint, min_size).run()
+    return sorted(results, key=lambda result: not result["full"])
@@ -1,28 +1,51 @@
 import numpy as np
-import sage.libs.lrcalc.lrcalc as lrcalc
-from collections import Counter
+import atexit
+import os
+import sqlite3
+import sys
+from collections import Counter, OrderedDict
 
+from src.instrument import instrumented
+from src.weight import Weight
+
+@instrumented()
 def formatting(v: list, k: int) -> np.array:
     """
     from a list v, extend it with zeros until it has length k and check if it corresponds to a dominant weight, that is
     extends a list with zeros and raises an error if the list is not decreasing
 
+    The check is done once per weight, by the interned Weight type.
+
+    Args:
+        v: vector to extend, any list-like data type or a Weight
+        k: extended length
+    Return: 
+        padded: a new np.array of length k of decreasing entries
+    """
+    return weight_array(v, k).copy()
+
+@instrumented()
+def weight_array(v: list, k: int) -> np.array:
+    """
+    formatting without the copy: the array of the interned Weight, shared by all the callers. 
+    Used on the hot paths of the package, the array is read-only.
+
     Args:
-        v: vector to extend, any list-like data type
+        v: vector to extend, any list-like data type or a Weight
         k: extended length
     Return: 
-        padded: a np.array of length k of decreasing entries
+        padded: a read-only np.array of length k of decreasing entries
     """
-    array_v = np.array(v, dtype=int)
-    padded = np.pad(array_v, (0, k-len(array_v)), mode='constant', constant_values=0)
-    if not(np.array_equal(padded, np.sort(padded)[::-1])):
-        raise Exception("A weight should be decreasing")
-    return padded
+    if type(v) is Weight and v.k == k:
+        return v.array
+    return Weight(v, k).array
 
+@instrumented()
 def LRfactors(U_alpha: list, U_beta: list, k:int) -> Counter:
     """
     computes the tensor product with multiplicities of two weights using LR-rule. 
-    This is the key point that forces the use of Sage instead of Python.
+    The LR coefficients come from the backend chosen by set_LR_backend (Sage's lrcalc or the Python one).
+    Products are memoized in LR_cache, keyed on the twist-normalized weights.
 
     Args:
         U_alpha, U_beta: two weights
@@ -30,15 +53,267 @@ def LRfactors(U_alpha: list, U_beta: list, k:int) -> Counter:
     Returns:
         factors_w_multip: a Counter object with entries weights and multiplicities coming from Littlewood-Richardson formula
     """
-    U_alpha = formatting(U_alpha, k)
-    U_beta = formatting(U_beta, k)
+    U_alpha = Weight(U_alpha, k)
+    U_beta = Weight(U_beta, k)
     #the function lrcalc works only on positive weights, hence we compute it on a twist
-    U_alpha_pos = U_alpha - U_alpha[-1] 
-    U_beta_pos = U_beta - U_beta[-1]
-    pos_factors_w_multip = lrcalc.mult(U_alpha_pos,U_beta_pos,k)
+    U_alpha_pos = U_alpha.normalized
+    U_beta_pos = U_beta.normalized
+    key = LR_cache.key(U_alpha_pos, U_beta_pos, k)
+    pos_factors_w_multip = LR_cache.get(key)
+    if pos_factors_w_multip is None:
+        pos_factors_w_multip = LR_cache.put(key, _LR_mult(list(U_alpha_pos),list(U_beta_pos),k))
     factors_w_multip = Counter({})
     #need to twist back again the entries and leave multiplicity unchanged
-    for i in pos_factors_w_multip:
-        factors_w_multip[tuple(formatting(i,k) + U_alpha[-1] + U_beta[-1])] += pos_factors_w_multip[i]
+    twist = U_alpha.twist + U_beta.twist
+    for i, multip in pos_factors_w_multip:
+        factors_w_multip[tuple(entry + twist for entry in i)] += multip
     return factors_w_multip
 
+@instrumented()
+def LRfactors_batch(pairs: list, k: int) -> list:
+    """
+    computes LRfactors for many pairs of weights, passing all the products missing from the cache 
+    to the backend at once (the Python backend evaluates them in a single vectorized pass).
+
+    Args:
+        pairs: a list of pairs of weights (U_alpha, U_beta)
+        k: as in IGr(k, 2n+1)
+    Returns:
+        a list of Counter objects as in LRfactors, one for each pair
+    """
+    formatted = [(Weight(U_alpha, k), Weight(U_beta, k)) for U_alpha, U_beta in pairs]
+    keys = [LR_cache.key(U_alpha.normalized, U_beta.normalized, k) for U_alpha, U_beta in formatted]
+    cached = {key: LR_cache.get(key) for key in set(keys)}
+    missing = [key for key, factors in cached.items() if factors is None]
+    for key, product in zip(missing, _LR_mult_batch([(key[1], key[2]) for key in missing], k)):
+        cached[key] = LR_cache.put(key, product)
+    products = []
+    for key, (U_alpha, U_beta) in zip(keys, formatted):
+        twist = U_alpha.twist + U_beta.twist
+        factors_w_multip = Counter({})
+        for i, multip in cached[key]:
+            factors_w_multip[tuple(entry + twist for entry in i)] += multip
+        products.append(factors_w_multip)
+    return products
+
+def set_LR_backend(name: str = "auto") -> str:
+    """
+    choose the implementation of the Littlewood-Richardson rule used by LRfactors.
+
+    Args:
+        name: "sage" for lrcalc (requires Sage), "python" for the module littlewood_richardson, 
+            "auto" for lrcalc if Sage has already been imported (e.g. in a Sage notebook) and python otherwise
+    Return:
+        the name of the chosen backend
+    """
+    global LR_backend, _LR_mult, _LR_mult_batch
+    if name == "auto":
+        name = "sage" if "sage" in sys.modules else "python"
+    if name == "sage":
+        import sage.libs.lrcalc.lrcalc as lrcalc
+        _LR_mult = instrumented("LR_mult")(lrcalc.mult)
+        _LR_mult_batch = instrumented("LR_mult_batch")(lambda pairs, k: [lrcalc.mult(list(a), list(b), k) for a, b in pairs])
+    elif name == "python":
+        from src import littlewood_richardson
+        _LR_mult = instrumented("LR_mult")(littlewood_richardson.mult)
+        _LR_mult_batch = instrumented("LR_mult_batch")(littlewood_richardson.mult_batch)
+    else:
+        raise Exception(f"Unknown LR backend {name}, use sage, python or auto")
+    LR_backend = name
+    return name
+
+class LRcache:
+    """
+    Memo cache for the products computed by LRfactors. 
+    Since LRfactors reduces every product to twist-normalized weights (last entry equal to 0), a single entry 
+    serves all the twists of a pair of weights; the key is order-symmetric, as the tensor product is commutative.
+    Entries are kept in memory with LRU eviction and optionally stored in a sqlite file, 
+    so that a new session can start with the products computed in a previous one.
+    A sqlite connection must not be shared across a fork: a process forked from the one that attached the file 
+    (e.g. a worker of a process pool) opens its own connection the first time it uses the store.
+
+    Attributes:
+        maxsize: maximal number of products kept in memory
+        path: path of the sqlite file, None if the cache lives only in memory
+        hits, misses: number of products found in the cache or not found (hence passed to lrcalc)
+        disk_hits: number of hits served by the sqlite file
+    """
+    def __init__(self, maxsize: int = 2**16, path: str = None):
+        """
+        Constructor for LRcache.
+
+        Args:
+            maxsize: maximal number of products kept in memory
+            path: optional sqlite file storing the products on disk
+        """
+        self.maxsize = maxsize
+        self._memory = OrderedDict()
+        self._db = None
+        self._pid = None
+        self._pending = 0
+        self.path = None
+        self.reset_stats()
+        if path is not None:
+            self.attach(path)
+
+    @staticmethod
+    def key(U_alpha_pos, U_beta_pos, k: int) -> tuple:
+        """
+        order-symmetric key of a product of twist-normalized weights
+        """
+        pair = sorted([Weight(U_alpha_pos).entries, Weight(U_beta_pos).entries])
+        return (k, pair[0], pair[1])
+
+    def get(self, key: tuple):
+        """
+        Return:
+            the factors of the product as a tuple of pairs (weight, multiplicity), None if the product is not cached
+        """
+        factors = self._memory.get(key)
+        if factors is not None:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return factors
+        if self._store() is not None:
+            row = self._db.execute("SELECT factors FROM lr WHERE k=? AND alpha=? AND beta=?", 
+                                   (key[0], _encode(key[1]), _encode(key[2]))).fetchone()
+            if row is not None:
+                factors = _decode_factors(row[0])
+                self._remember(key, factors)
+                self.hits += 1
+                self.disk_hits += 1
+                return factors
+        self.misses += 1
+        return None
+    
+    def put(self, key: tuple, pos_factors_w_multip: dict) -> tuple:
+        """
+        store the output of lrcalc.mult for the key.
+
+        Return: 
+            factors: the stored factors, a tuple of pairs (weight padded to length k, multiplicity)
+        """
+        k = key[0]
+        factors = tuple((tuple(int(entry) for entry in weight_array(i, k)), int(pos_factors_w_multip[i])) 
+                        for i in pos_factors_w_multip)
+        self._remember(key, factors)
+        if self._store() is not None:
+            self._db.execute("INSERT OR REPLACE INTO lr VALUES (?, ?, ?, ?)", 
+                             (k, _encode(key[1]), _encode(key[2]), _encode_factors(factors)))
+            self._pending += 1
+            if self._pending >= 1024:
+                self.flush()
+        return factors
+    
+    def _remember(self, key, factors):
+        self._memory[key] = factors
+        if len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def attach(self, path: str):
+        """
+        use the sqlite file at path (created if missing) as on-disk store of the cache
+        """
+        self.close()
+        self.path = path
+        self._db = self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path)
+        db.execute("CREATE TABLE IF NOT EXISTS lr (k INTEGER, alpha TEXT, beta TEXT, factors TEXT, "
+                   "PRIMARY KEY (k, alpha, beta))")
+        self._pid = os.getpid()
+        return db
+
+    def _store(self):
+        """
+        the connection to the on-disk store of the current process, None if there is no store
+        """
+        if self._db is not None and self._pid != os.getpid():
+            # forked process: the connection of the parent is neither used nor closed here
+            _inherited_connections.append(self._db)
+            self._db = self._connect()
+            self._pending = 0
+        return self._db
+
+    def flush(self):
+        """
+        commit the products not yet written to disk
+        """
+        if self._store() is not None:
+            self._db.commit()
+        self._pending = 0
+
+    def close(self):
+        """
+        flush and detach the on-disk store
+        """
+        if self._store() is not None:
+            self.flush()
+            self._db.close()
+        self._db = None
+        self.path = None
+
+    def clear(self):
+        """
+        empty the in-memory cache, the on-disk store is left untouched
+        """
+        self._memory.clear()
+
+    def resize(self, maxsize: int):
+        """
+        change the maximal number of products kept in memory, evicting the least recently used ones if needed
+        """
+        self.maxsize = maxsize
+        while len(self._memory) > maxsize:
+            self._memory.popitem(last=False)
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+
+    def info(self) -> dict:
+        """
+        Return:
+            a dictionary with hits, misses (i.e. calls to lrcalc), disk hits, current and maximal size
+        """
+        return {"hits": self.hits, "misses": self.misses, "disk_hits": self.disk_hits, 
+                "size": len(self._memory), "maxsize": self.maxsize, "path": self.path}
+
+def _encode(weight: tuple) -> str:
+    return ",".join(str(entry) for entry in weight)
+
+def _encode_factors(factors: tuple) -> str:
+    return ";".join(_encode(weight) + ":" + str(multip) for weight, multip in factors)
+
+def _decode_factors(encoded: str) -> tuple:
+    factors = []
+    for item in encoded.split(";"):
+        if item:
+            weight, multip = item.split(":")
+            factors.append((tuple(int(entry) for entry in weight.split(",")), int(multip)))
+    return tuple(factors)
+
+#connections inherited from the parent process through a fork, kept so that they are never closed in the child
+_inherited_connections = []
+
+#cache shared by all the calls to LRfactors, see configure_LR_cache
+LR_cache = LRcache()
+atexit.register(LR_cache.close)
+
+def configure_LR_cache(maxsize: int = None, path: str = None):
+    """
+    change the size of the LRfactors cache and/or attach an on-disk store to it.
+
+    Args:
+        maxsize: new maximal number of products kept in memory
+        path: sqlite file to use as on-disk store, for instance one per IGr(k, 2n+1) 
+    """
+    if maxsize is not None:
+        LR_cache.resize(maxsize)
+    if path is not None:
+        LR_cache.attach(path)
+
+#backend chosen at import time, it can be forced with the environment variable ODDISOGRASS_LR_BACKEND
+set_LR_backend(os.environ.get("ODDISOGRASS_LR_BACKEND", "auto"))
@@ -1,8 +1,13 @@
 import numpy as np
-from collections import defaultdict, Counter
+import itertools
+import time
+from collections import defaultdict, Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from typing import Tuple
 
-from src.utilities import formatting, LRfactors
+from src.utilities import weight_array, LRfactors_batch
+from src.weight import Weight
+from src.instrument import instrumented
 
 def vanishingEvenGrass(weight:np.array, k:int, n:int) -> bool:
     """
@@ -25,6 +30,88 @@ def vanishingEvenGrass(weight:np.array, k:int, n:int) -> bool:
         return True 
     return not(len(set(np.abs(w)))==len(w))
 
+@instrumented()
+def vanishingEvenGrass_batch(weights, k:int, n:int) -> np.array:
+    """
+        vectorized version of vanishingEvenGrass: check many weights in one pass. 
+        A weight is acyclic if w + rho has a zero entry or two entries with the same absolute value, 
+        which we detect sorting |w + rho| along each row.
+
+        Args:
+            weights: an (N, l) integer array (or a list of N weights of the same length l <= n)
+            k, n: as in vanishingEvenGrass
+
+        Returns:
+            mask: a boolean array of length N, True where the weight is acyclic
+    """
+    weights = np.asarray(weights, dtype=int)
+    if weights.size == 0:
+        return np.ones(len(weights), dtype=bool)
+    padded = np.zeros((weights.shape[0], n), dtype=int)
+    padded[:, :weights.shape[1]] = weights
+    abs_w = np.sort(np.abs(padded + np.arange(n, 0, -1)), axis=1)
+    return (abs_w[:, 0] == 0) | np.any(abs_w[:, 1:] == abs_w[:, :-1], axis=1)
+
+#vertical strips {k: (sizes, strips)}, strips is the (2^k, k) array of all the 0/1 vectors and sizes their number of ones
+_vertical_strips = {}
+
+def _strips(k: int) -> Tuple[np.array, np.array]:
+    if k not in _vertical_strips:
+        strips = np.array(list(itertools.product((0, 1), repeat=k)), dtype=int).reshape(-1, k)
+        _vertical_strips[k] = (strips.sum(axis=1), strips)
+    return _vertical_strips[k]
+
+def _wedge_resolution(weights: list, k: int) -> Tuple[np.array, np.array, np.array]:
+    """
+        terms of the resolutions of many weights, U^weight x wedge^i U^{0,\dots,-1} for i=0..k, as flat arrays.
+        By the Pieri rule the terms of U^weight x wedge^i U^{0,\dots,-1} are the weights weight - strip, with multiplicity 1, 
+        for the 0/1 vectors strip with i ones such that weight - strip is still decreasing (removal of a vertical strip), 
+        so they are obtained for all the weights at once subtracting all the 0/1 vectors.
+
+        Args:
+            weights: a list of N weights of length k (or an (N, k) integer array)
+        Returns:
+            owners, positions, products: for each term, the index of the weight it comes from, i and the weight of the term
+    """
+    weights = np.asarray(weights, dtype=int).reshape(-1, k)
+    sizes, strips = _strips(k)
+    terms = weights[:, np.newaxis, :] - strips[np.newaxis, :, :]
+    dominant = np.all(terms[:, :, :-1] >= terms[:, :, 1:], axis=2)
+    owners, which = np.nonzero(dominant)
+    return owners, sizes[which], terms[owners, which]
+
+@instrumented()
+def vanishingOddGrass_batch(weights: list, k:int, n:int) -> np.array:
+    """
+        vectorized version of vanishingOddGrass: all the entries of the resolutions of all weights 
+        are checked on the even Grassmannian in a single call of vanishingEvenGrass_batch.
+
+        Args:
+            weights: a list of N weights of length k (or an (N, k) integer array)
+            k, n: fix IGr(k,2n+1)
+
+        Returns:
+            mask: a boolean array of length N, True where all the entries of the resolution are acyclic
+    """
+    if isinstance(weights, np.ndarray) and weights.ndim == 2 and weights.shape[1] == k:
+        weights = weights.astype(int, copy=False)
+        if np.any(weights[:, :-1] < weights[:, 1:]):
+            raise Exception("A weight should be decreasing")
+    else:
+        weights = np.array([weight_array(weight, k) for weight in weights], dtype=int).reshape(-1, k)
+    mask = np.ones(len(weights), dtype=bool)
+    to_compute = np.arange(len(weights))
+    index = vanishing_indices.get((k, n))
+    if index is not None and len(weights) > 0:
+        found, verdicts = index.lookup_batch(weights)
+        mask[found] = verdicts[found]
+        to_compute = np.nonzero(~found)[0]
+    owners, _, products = _wedge_resolution(weights[to_compute], k)
+    even_vanish = vanishingEvenGrass_batch(products, k, n+1)
+    mask[to_compute[owners[~even_vanish]]] = False
+    return mask
+
+@instrumented()
 def vanishingOddGrass(weight:np.array, k:int, n:int) -> Tuple[bool, dict]:
     """
         compute cohomology of U^weight using the spectral sequence induced by the embedding in the even Grassmannian. 
@@ -39,16 +126,272 @@ def vanishingOddGrass(weight:np.array, k:int, n:int) -> Tuple[bool, dict]:
             boolean: True if all entries of the resolution are acyclic on the even Grassmannian
             nonvanish: a dictionary with shifts and nonvanishing entries
     """
-    formatted_weight = formatting(weight, k)
+    formatted_weight = weight_array(weight, k)
+    index = vanishing_indices.get((k, n))
+    if index is not None:
+        answer = index.lookup(formatted_weight)
+        if answer is not None:
+            return answer
     nonvanish = defaultdict(set)
-    for i in range(k+1):
-        wedge_i = [0]*(k-i) + [-1]*i
-        prod_i = LRfactors(formatted_weight, wedge_i,k)
-        for p_i in prod_i:
-            if not(vanishingEvenGrass(p_i, k, n+1)):
-                nonvanish[i].add(p_i)
+    _, positions, products = _wedge_resolution([formatted_weight], k)
+    even_vanish = vanishingEvenGrass_batch(products, k, n+1)
+    for i, p_i, vanish in zip(positions.tolist(), products.tolist(), even_vanish):
+        if not vanish:
+            nonvanish[i].add(tuple(p_i))
     return len(nonvanish)==0, dict(nonvanish)
     
+class VanishingIndex:
+    """
+    Precomputed answers of vanishingOddGrass on IGr(k,2n+1) for all dominant weights in the box |entries| <= bound, 
+    stored in a dense array indexed by weight + bound. 
+    Once registered with use_vanishing_index, vanishingOddGrass, extOddGrass and complex_entry.non_vanish_terms 
+    answer with a lookup for weights in the box and compute the others.
+
+    Attributes:
+        k, n: fix IGr(k,2n+1)
+        bound: the box contains the weights with |entries| <= bound
+        verdicts: int8 array of shape (2*bound+1,)*k, 1 if the weight is acyclic, 0 if not, -1 if it is not dominant
+        nonvanish: a dictionary {weight: nonvanish} for the non-acyclic weights, nonvanish as in vanishingOddGrass
+    """
+    def __init__(self, k: int, n: int, bound: int = None, verdicts: np.array = None, nonvanish: dict = None):
+        """
+        Constructor for VanishingIndex, computes the index unless verdicts and nonvanish are given.
+
+        Args:
+            k, n: fix IGr(k,2n+1)
+            bound: size of the box, default 2*(2n+1-k)
+        """
+        self.k = k
+        self.n = n
+        self.bound = 2*(2*n+1-k) if bound is None else bound
+        if verdicts is None:
+            verdicts, nonvanish = self._compute()
+        self.verdicts = verdicts
+        self.nonvanish = nonvanish
+
+    def _compute(self) -> Tuple[np.array, dict]:
+        verdicts = -np.ones((2*self.bound+1,)*self.k, dtype=np.int8)
+        weights = [w for w in itertools.combinations_with_replacement(range(self.bound, -self.bound-1, -1), self.k)]
+        owners, positions, products = _wedge_resolution(weights, self.k)
+        even_vanish = vanishingEvenGrass_batch(products, self.k, self.n+1)
+        nonvanish = defaultdict(lambda: defaultdict(set))
+        for owner, i, p_i, vanish in zip(owners.tolist(), positions.tolist(), products.tolist(), even_vanish):
+            if not vanish:
+                nonvanish[weights[owner]][i].add(tuple(p_i))
+        for weight in weights:
+            verdicts[tuple(np.array(weight) + self.bound)] = weight not in nonvanish
+        return verdicts, {weight: dict(positions) for weight, positions in nonvanish.items()}
+
+    def lookup(self, weight):
+        """
+        Return:
+            the output of vanishingOddGrass(weight, k, n), None if weight is not in the box
+        """
+        weight = tuple(int(i) for i in weight)
+        if max(abs(i) for i in weight) > self.bound:
+            return None
+        if self.verdicts[tuple(i + self.bound for i in weight)] == 1:
+            return True, {}
+        return False, {i: set(terms) for i, terms in self.nonvanish[weight].items()}
+
+    def lookup_batch(self, weights: np.array) -> Tuple[np.array, np.array]:
+        """
+        Args:
+            weights: an (N, k) array of dominant weights
+        Return:
+            found: a boolean array of length N, True where the weight is in the box
+            verdicts: a boolean array of length N, True where the weight is in the box and it is acyclic
+        """
+        weights = np.asarray(weights, dtype=int).reshape(-1, self.k)
+        found = np.all(np.abs(weights) <= self.bound, axis=1)
+        verdicts = np.zeros(len(weights), dtype=bool)
+        verdicts[found] = self.verdicts[tuple((weights[found] + self.bound).T)] == 1
+        return found, verdicts
+
+    def save(self, path: str):
+        """
+        save the index in a .npz file
+        """
+        owners, positions, terms = [], [], []
+        weights = list(self.nonvanish.keys())
+        for owner, weight in enumerate(weights):
+            for i, terms_i in self.nonvanish[weight].items():
+                for term in terms_i:
+                    owners.append(owner)
+                    positions.append(i)
+                    terms.append(term)
+        np.savez_compressed(path, k=self.k, n=self.n, bound=self.bound, verdicts=self.verdicts, 
+                            weights=np.array(weights, dtype=int).reshape(-1, self.k), owners=np.array(owners, dtype=int), 
+                            positions=np.array(positions, dtype=int), terms=np.array(terms, dtype=int).reshape(-1, self.k))
+
+    @classmethod
+    def load(cls, path: str):
+        """
+        load an index saved with save
+        """
+        data = np.load(path)
+        weights = [tuple(int(i) for i in weight) for weight in data["weights"]]
+        nonvanish = {weight: defaultdict(set) for weight in weights}
+        for owner, i, term in zip(data["owners"], data["positions"], data["terms"]):
+            nonvanish[weights[owner]][int(i)].add(tuple(int(entry) for entry in term))
+        return cls(int(data["k"]), int(data["n"]), int(data["bound"]), data["verdicts"], 
+                   {weight: dict(positions) for weight, positions in nonvanish.items()})
+
+#indices consulted by the vanishing functions, with keys (k, n)
+vanishing_indices = {}
+
+def use_vanishing_index(index: VanishingIndex):
+    """
+    register a VanishingIndex, replacing the previous one for the same (k, n)
+    """
+    vanishing_indices[(index.k, index.n)] = index
+
+#Ext atlases (see ext_atlas) consulted by the Ext functions, with keys (k, n)
+ext_atlases = {}
+
+def use_ext_atlas(atlas):
+    """
+    register an ExtAtlas, replacing the previous one for the same (k, n)
+    """
+    ext_atlases[(atlas.k, atlas.n)] = atlas
+
+def canonical_Ext_pair(U_alpha: list, U_beta: list, k: int) -> Tuple[tuple, tuple]:
+    """
+        canonical representative of the Ext queries equivalent to Ext(U_alpha, U_beta). 
+        The Ext only depend on the LR decomposition of (-U_alpha)^rev x U_beta, which does not change when both weights 
+        are twisted by the same amount or when (U_alpha, U_beta) is replaced with (U_beta^*, U_alpha^*), 
+        so Ext(U_alpha(l+m), U_beta(m)) = Ext(U_beta^*(l), U_alpha^*) for all l, m. 
+
+        Args:
+            U_alpha, U_beta: as in Ext(U_alpha, U_beta)
+            k: length of the weights
+        Returns:
+            (alpha, beta): the smallest of the pair and of the dual-swapped pair, twisted so that alpha[-1] = 0, as tuples
+    """
+    alpha, beta = Weight(U_alpha, k), Weight(U_beta, k)
+    direct = (alpha.normalized.entries, beta.shift(-alpha.twist).entries)
+    swapped = (beta.dual.normalized.entries, alpha.dual.shift(-beta.dual.twist).entries)
+    return min(direct, swapped)
+
+class ExtCache:
+    """
+    Memo cache for the Ext computed by extOddGrass_batch, keyed on canonical_Ext_pair and the twists: 
+    all the queries in the orbit of a pair under twists and duality after the first one are hits. 
+    Entries are kept in memory with LRU eviction, frozen as tuples so that callers only ever get copies.
+
+    Attributes:
+        maxsize: maximal number of entries
+        queries: number of pairs asked to extOddGrass, extOddGrass_twists and extOddGrass_batch
+        computed: number of pairs whose Ext were computed, the other queries were equivalent to a cached pair, 
+            to a pair of the same batch or answered by an ExtAtlas
+        atlas_hits: number of queries answered by a registered ExtAtlas
+    """
+    def __init__(self, maxsize: int = 2**16):
+        self.maxsize = maxsize
+        self._memory = OrderedDict()
+        self.reset_stats()
+
+    def get(self, key: tuple):
+        """
+        Return:
+            the frozen pair (profile, nonvanish) stored for the key, None if it is not cached
+        """
+        value = self._memory.get(key)
+        if value is not None:
+            self._memory.move_to_end(key)
+        return value
+
+    def put(self, key: tuple, value: tuple):
+        self._memory[key] = value
+        if len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def clear(self):
+        self._memory.clear()
+
+    def reset_stats(self):
+        self.queries = 0
+        self.computed = 0
+        self.atlas_hits = 0
+
+    def info(self) -> dict:
+        """
+        Return:
+            a dictionary with queries, computed pairs, atlas hits, the dedup ratio queries / computed, current and maximal size
+        """
+        return {"queries": self.queries, "computed": self.computed, "atlas_hits": self.atlas_hits, 
+                "dedup_ratio": self.queries / self.computed if self.computed > 0 else None, 
+                "size": len(self._memory), "maxsize": self.maxsize}
+
+#cache shared by all the Ext queries
+Ext_cache = ExtCache()
+
+def _freeze_Ext(profile: dict, nonvanish: dict) -> tuple:
+    return tuple(profile.items()), tuple((l, tuple(counter.items())) for l, counter in nonvanish.items())
+
+def _thaw_Ext(frozen: tuple) -> Tuple[dict, dict]:
+    profile, nonvanish = frozen
+    return dict(profile), {l: Counter(dict(items)) for l, items in nonvanish}
+
+@instrumented()
+def extOddGrass_batch(pairs: list, k: int, n: int, twists: list = None) -> list:
+    """
+        extOddGrass_twists for many pairs of weights. Every pair is replaced with its canonical_Ext_pair, 
+        so each orbit of equivalent pairs is computed once (and cached in Ext_cache); 
+        the LR products of the new canonical pairs are computed with a single call of LRfactors_batch 
+        and the vanishing of all their shifted summands is checked with a single call of vanishingOddGrass_batch.
+
+        Args:
+            pairs: a list of pairs (U_alpha, U_beta), as in Ext(U_alpha, U_beta)
+            k, n: fix IGr(k,2n+1)
+            twists: the twists l to check, default l=0,...,2n+1-k
+        Returns:
+            a list with a pair (profile, nonvanish) as in extOddGrass_twists for each pair, 
+            every pair gets its own dictionaries and Counters
+    """
+    if twists is None:
+        twists = range(2*n+2-k)
+    twists = tuple(int(l) for l in twists)
+    Ext_cache.queries += len(pairs)
+    results = [None]*len(pairs)
+    missing = {}
+    atlas = ext_atlases.get((k, n))
+    for position, (U_alpha, U_beta) in enumerate(pairs):
+        if atlas is not None:
+            answer = atlas.query(weight_array(U_alpha, k), weight_array(U_beta, k), list(twists))
+            if answer is not None:
+                Ext_cache.atlas_hits += 1
+                results[position] = _freeze_Ext(*answer)
+                continue
+        key = (k, n, canonical_Ext_pair(U_alpha, U_beta, k), twists)
+        cached = Ext_cache.get(key)
+        if cached is not None:
+            results[position] = cached
+        else:
+            missing.setdefault(key, []).append(position)
+    if len(missing) != 0:
+        keys = list(missing)
+        products = LRfactors_batch([(Weight(key[2][0], k).dual, key[2][1]) for key in keys], k)
+        summands = [list(product.keys()) for product in products]
+        offsets = np.cumsum([0] + [len(summands_key) for summands_key in summands])
+        flat = np.array([p for summands_key in summands for p in summands_key], dtype=int).reshape(-1, k)
+        shifted = (flat[np.newaxis, :, :] - np.array(twists, dtype=int).reshape(-1, 1, 1)).reshape(-1, k)
+        vanish = vanishingOddGrass_batch(shifted, k, n).reshape(len(twists), len(flat))
+        for index, key in enumerate(keys):
+            product, key_vanish = products[index], vanish[:, offsets[index]:offsets[index+1]]
+            profile, nonvanish = {}, {}
+            for row, l in enumerate(twists):
+                profile[l] = bool(np.all(key_vanish[row]))
+                if not profile[l]:
+                    nonvanish[l] = Counter({tuple(i - l for i in p): product[p] 
+                                            for p, p_vanish in zip(summands[index], key_vanish[row]) if not p_vanish})
+            frozen = _freeze_Ext(profile, nonvanish)
+            Ext_cache.put(key, frozen)
+            Ext_cache.computed += 1
+            for position in missing[key]:
+                results[position] = frozen
+    return [_thaw_Ext(frozen) for frozen in results]
+
 def extOddGrass(U_alpha: list, U_beta: list, k: int, n: int) -> Tuple[bool, dict]:
     """
         compute Ext(U_alpha, U_beta) using the vanishing on the odd Grassmannian. 
@@ -62,11 +405,26 @@ def extOddGrass(U_alpha: list, U_beta: list, k: int, n: int) -> Tuple[bool, dict
             boolean: True if all entries are acyclic 
             nonvanish: a Counter with nonvanishing entries and multiplicities. 
     """
-    formatted_alpha = formatting(U_alpha, k)
-    formatted_beta = formatting(U_beta, k)
-    product = LRfactors(-formatted_alpha[::-1], formatted_beta, k)
-    nonvanish = Counter({p: product[p] for p in product.keys() if not vanishingOddGrass(p, k, n)[0]})
-    return len(nonvanish)==0, nonvanish
+    profile, nonvanish = extOddGrass_batch([(U_alpha, U_beta)], k, n, [0])[0]
+    return profile[0], nonvanish.get(0, Counter())
+
+@instrumented()
+def extOddGrass_twists(U_alpha: list, U_beta: list, k: int, n: int, twists: list = None) -> Tuple[dict, dict]:
+    """
+        compute Ext(U_alpha(l), U_beta) for many twists l from a single LR product: 
+        twisting U_alpha by l shifts every summand of (-U_alpha)^rev x U_beta by -l, 
+        so all the shifted summands are checked in one call of vanishingOddGrass_batch. 
+        The pair is canonicalized and cached as in extOddGrass_batch.
+
+        Args:
+            U_alpha, U_beta: as in Ext(U_alpha, U_beta)
+            k, n: fix IGr(k,2n+1)
+            twists: the twists l to check, default l=0,...,2n+1-k
+        Returns:
+            profile: a dictionary {l: True if Ext(U_alpha(l), U_beta) = 0}
+            nonvanish: a dictionary {l: Counter with nonvanishing entries and multiplicities} for the twists with Ext != 0
+    """
+    return extOddGrass_batch([(U_alpha, U_beta)], k, n, twists)[0]
 
 def Lefschetz_indep(U_alpha: list, U_beta: list, k: int, n: int) -> bool:
     """
@@ -79,9 +437,8 @@ def Lefschetz_indep(U_alpha: list, U_beta: list, k: int, n: int) -> bool:
         Returns:
             vanish_twists: the list of l=0,...,2n+1-k with Ext(U_alpha(l), U_beta) = 0
     """
-    formatted_alpha = formatting(U_alpha, k)
-    formatted_beta = formatting(U_beta, k)
-    vanish_twists = [i for i in range(2*n+2-k) if extOddGrass(formatted_alpha+i, formatted_beta, k, n)[0]]
+    profile, _ = extOddGrass_twists(U_alpha, U_beta, k, n)
+    vanish_twists = [i for i in range(2*n+2-k) if profile[i]]
     return vanish_twists
 
 def is_Lefschetz_excep(U_alpha: list, k: int, n: int) -> bool:
@@ -92,37 +449,210 @@ def is_Lefschetz_excep(U_alpha: list, k: int, n: int) -> bool:
             U_alpha, k, n
 
         Return:
-            a boolean that is true if the only non-acyclic term is U^[0,0,0] only if l = 0 with multiplicity 1.
+            a boolean that is true if the only non-acyclic term is U^{0,...,0} only if l = 0 with multiplicity 1.
     """
-    formatted_alpha = formatting(U_alpha, k)
-    if Lefschetz_indep(formatted_alpha, formatted_alpha, k, n) == [i for i in range(1, 2*n+2-k)]:
-        non_vanishes = extOddGrass(formatted_alpha, formatted_alpha, k, n)[1]
-        return non_vanishes == {tuple([0,0,0]): 1}
+    formatted_alpha = weight_array(U_alpha, k)
+    profile, nonvanish = extOddGrass_twists(formatted_alpha, formatted_alpha, k, n)
+    if [i for i in range(2*n+2-k) if profile[i]] == [i for i in range(1, 2*n+2-k)]:
+        return nonvanish[0] == {(0,)*k: 1}
     else:
         return False
     
-def is_Lefschetz_basis(except_sequence, k, n):
+def iter_Lefschetz_violations(except_sequence, k, n):
+    """
+        Yield the reasons why a sequence of weights is not a Lefschetz basis, as soon as they are found. 
+        The checks are the ones of is_Lefschetz_basis, in the same order.
+
+        Args:
+            except_sequence: a list of weights presented as lists
+            k, n
+
+        Yields:
+            records: dictionaries
+                {"kind": "not_exceptional", "index": index, "weight": weight, "nonvanish": {l: Counter}} 
+                for a weight which is not Lefschetz exceptional, with the non-acyclic summands of Ext(U_weight(l), U_weight);
+                {"kind": "nonvanishing_ext", "indices": (second_index, index), "weights": (second_weight, weight), 
+                "twist": l, "nonvanish": Counter} for every twist l with Ext(U_second_weight(l), U_weight) != 0
+    """
+    sequence = [tuple(int(i) for i in weight_array(weight, k)) for weight in except_sequence]
+    for index, weight in enumerate(sequence):
+        if not is_Lefschetz_excep(weight, k, n):
+            yield {"kind": "not_exceptional", "index": index, "weight": weight, 
+                   "nonvanish": extOddGrass_twists(weight, weight, k, n)[1]}
+        later = [(second_weight, weight) for second_weight in sequence[index+1:]]
+        for second_index, (profile, nonvanish) in enumerate(extOddGrass_batch(later, k, n), start=index+1):
+            for l in sorted(nonvanish):
+                yield {"kind": "nonvanishing_ext", "indices": (second_index, index), "weights": (sequence[second_index], weight), 
+                       "twist": l, "nonvanish": nonvanish[l]}
+
+def is_Lefschetz_basis(except_sequence, k, n, workers=1, verbose=False, euler_precheck=False):
     """
         Is a sequence of weights a Lefschetz basis?
 
         Args:
             except_sequence: a list of weights presented as lists
             k, n
+            workers: number of processes used by Lefschetz_basis_report
+            verbose: print the first problem found
+            euler_precheck: first check that the Gram matrix of the Euler form is upper unitriangular (see euler.Euler_precheck), 
+                a necessary condition that rejects some sequences before computing the Ext
 
         Return:
             a boolean that is true if it is an exceptional basis, False 
             if either some Ext are nonvanishing or some weights are not exceptional.
     """
-    for index in range(len(except_sequence)):
-        if not is_Lefschetz_excep(except_sequence[index],k,n):
-            print("not except:", except_sequence[index])
+    if euler_precheck:
+        from src.euler import Euler_precheck
+        if not Euler_precheck(except_sequence, k, n)[0]:
+            if verbose:
+                print("The Gram matrix of the Euler form is not upper unitriangular")
             return False
-        for second_index in range(index+1, len(except_sequence)):
-            if Lefschetz_indep(except_sequence[second_index], except_sequence[index], k, n) != list(range(2*n+2-k)):
+    if workers == 1:
+        violation = next(iter_Lefschetz_violations(except_sequence, k, n), None)
+        if verbose and violation is not None:
+            if violation["kind"] == "not_exceptional":
+                print("not except:", except_sequence[violation["index"]])
+            else:
+                second_index, index = violation["indices"]
                 print("Problem with", except_sequence[second_index], except_sequence[index])
-                return False
-    return True
+        return violation is None
+    report = Lefschetz_basis_report(except_sequence, k, n, workers=workers, fail_fast=True)
+    if verbose and len(report.non_exceptional) != 0:
+        print("not except:", except_sequence[report.non_exceptional[0]])
+    elif verbose and len(report.failures) != 0:
+        second_index, index = report.failures[0]
+        print("Problem with", except_sequence[second_index], except_sequence[index])
+    return report.is_basis()
+
+class LefschetzReport:
+    """
+    Result of Lefschetz_basis_report on a sequence of weights.
+
+    Attributes:
+        sequence: the sequence of weights, as tuples
+        k, n: fix IGr(k,2n+1)
+        non_exceptional: indices of the weights which are not Lefschetz exceptional
+        profiles: a dictionary {(second_index, index): {l: True if Ext(U_second(l), U_index) = 0}} for the checked pairs
+        failures: the pairs (second_index, index), second_index > index, with some nonvanishing Ext, in the order of the checks
+        timings: a dictionary {task: seconds}, with tasks ("excep", index) or ("pair", second_index, index)
+        complete: False if the computation stopped at the first failure before checking everything
+        gram: the Gram matrix of the Euler form on the twists of the sequence (see euler.Euler_Gram_matrix), 
+            None if the Euler precheck was not requested
+        gram_unitriangular: True if gram is upper unitriangular, None if the Euler precheck was not requested
+    """
+    def __init__(self, sequence: list, k: int, n: int):
+        self.sequence = sequence
+        self.k = k
+        self.n = n
+        self.non_exceptional = []
+        self.profiles = {}
+        self.failures = []
+        self.timings = {}
+        self.complete = True
+        self.gram = None
+        self.gram_unitriangular = None
+
+    def is_basis(self) -> bool:
+        return len(self.non_exceptional) == 0 and len(self.failures) == 0 and self.gram_unitriangular is not False
+
+    def __str__(self) -> str:
+        lines = [f"Lefschetz basis: {self.is_basis()}" + ("" if self.complete else " (stopped at the first failure)")]
+        if self.gram_unitriangular is False:
+            lines.append("the Gram matrix of the Euler form is not upper unitriangular")
+        lines += [f"not except: {self.sequence[index]}" for index in self.non_exceptional]
+        for second_index, index in self.failures:
+            twists = [l for l, vanish in self.profiles[(second_index, index)].items() if not vanish]
+            lines.append(f"Problem with {self.sequence[second_index]} {self.sequence[index]} at twists {twists}")
+        lines.append(f"checked {len(self.timings)} tasks in {sum(self.timings.values()):.2f}s")
+        return "\n".join(lines)
+
+def Lefschetz_tasks(sequence: tuple, tasks: list, k: int, n: int) -> list:
+    """
+    run a chunk of tasks of Lefschetz_basis_report (and of search.compatibility_graph), it is executed in the worker processes.
+    A task is ("excep", i), exceptionality of sequence[i], or ("pair", i, j), the twist profile of Ext(U_sequence[i](l), U_sequence[j])
+
+    Return:
+        a list of triples (task, result, seconds), where result is a boolean for exceptionality and a twist profile for pairs
+    """
+    results = []
+    for task in tasks:
+        start = time.perf_counter()
+        if task[0] == "excep":
+            result = is_Lefschetz_excep(sequence[task[1]], k, n)
+        else:
+            result = extOddGrass_twists(sequence[task[1]], sequence[task[2]], k, n)[0]
+        results.append((task, result, time.perf_counter() - start))
+    return results
+
+def Lefschetz_basis_report(except_sequence, k, n, workers=1, chunksize=16, fail_fast=False, euler_precheck=False) -> LefschetzReport:
+    """
+        Check if a sequence of weights is a Lefschetz basis, collecting the results in a LefschetzReport.
+        The checks are the ones of is_Lefschetz_basis: every weight is Lefschetz exceptional and 
+        Ext(U_second(l), U_index) = 0 for second_index > index and l=0,...,2n+1-k.
+
+        Args:
+            except_sequence: a list of weights presented as lists
+            k, n
+            workers: number of processes, with workers=1 everything runs in the current process
+            chunksize: number of checks sent to a process at once
+            fail_fast: stop (cancelling the pending checks) at the first problem in the order of the checks, 
+                as with workers=1, otherwise check everything
+            euler_precheck: compute first the Gram matrix of the Euler form and store it in the report; 
+                with fail_fast, stop there if it is not upper unitriangular
+
+        Return:
+            report: a LefschetzReport
+    """
+    sequence = tuple(tuple(int(i) for i in weight_array(weight, k)) for weight in except_sequence)
+    report = LefschetzReport(sequence, k, n)
+    if euler_precheck:
+        from src.euler import Euler_precheck
+        report.gram_unitriangular, report.gram = Euler_precheck(sequence, k, n)
+        if fail_fast and not report.gram_unitriangular:
+            report.complete = False
+            return report
+    tasks = []
+    for index in range(len(sequence)):
+        tasks.append(("excep", index))
+        tasks += [("pair", second_index, index) for second_index in range(index+1, len(sequence))]
 
-        
+    def record(results) -> bool:
+        failed = False
+        for task, result, seconds in results:
+            report.timings[task] = seconds
+            if task[0] == "excep":
+                if not result:
+                    report.non_exceptional.append(task[1])
+                    failed = True
+            else:
+                report.profiles[task[1:]] = result
+                if not all(result.values()):
+                    report.failures.append(task[1:])
+                    failed = True
+        return failed
 
+    if workers == 1:
+        for task in tasks:
+            if record(Lefschetz_tasks(sequence, [task], k, n)) and fail_fast:
+                report.complete = len(report.timings) == len(tasks)
+                break
+        return report
 
+    chunks = [tasks[i:i+chunksize] for i in range(0, len(tasks), chunksize)]
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = [executor.submit(Lefschetz_tasks, sequence, chunk, k, n) for chunk in chunks]
+        # the results are read in the order of the tasks, so that with fail_fast the report stops 
+        # at the same first problem as with workers=1, whatever the order in which the chunks complete
+        stopped = False
+        for future in futures:
+            for result in future.result():
+                if record([result]) and fail_fast:
+                    stopped = True
+                    break
+            if stopped:
+                report.complete = len(report.timings) == len(tasks)
+                break
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+    return report
@@ -0,0 +1,158 @@
+"""
+This module contains the Weight type, an immutable dominant weight of length k.
+
+A Weight is validated once (padded with zeros to length k, entries decreasing) and interned:
+Weight(v, k) returns the same object for the same entries, so the derived data
+(the NumPy array, the dual weight, the twist-normalized weight) is computed once per weight.
+A Weight hashes and compares as the tuple of its entries, so it can be used as a key of the dictionaries
+and Counters of the package together with plain tuples, and it can be passed to every function taking
+a weight as a list, tuple or array.
+"""
+
+import numpy as np
+from collections import OrderedDict
+
+#interned weights {(k, entries): Weight}, least recently used first; 
+#beyond INTERN_LIMIT entries the least recently used weight is dropped
+_interned = OrderedDict()
+INTERN_LIMIT = 2**18
+
+class Weight:
+    """
+    Immutable dominant weight.
+
+    Attributes:
+        entries: a tuple of k decreasing integers
+        k: the length
+    """
+    __slots__ = ("entries", "k", "_hash", "_array", "_dual", "_normalized")
+
+    def __new__(cls, v, k: int = None):
+        """
+        Args:
+            v: any list-like data type of decreasing integers, or a Weight
+            k: length of the weight, v is extended with zeros; default len(v)
+        """
+        if type(v) is Weight and (k is None or v.k == k):
+            return v
+        if k is None:
+            k = len(v)
+        if type(v) is tuple:
+            weight = _interned.get((k, v))
+            if weight is not None:
+                _interned.move_to_end((k, v))
+                return weight
+        entries = tuple(int(i) for i in (v.tolist() if isinstance(v, np.ndarray) else v))
+        if len(entries) > k:
+            raise Exception("A weight should have at most k entries")
+        entries = entries + (0,)*(k - len(entries))
+        weight = _interned.get((k, entries))
+        if weight is not None:
+            _interned.move_to_end((k, entries))
+            return weight
+        if any(entries[i] < entries[i+1] for i in range(k-1)):
+            raise Exception("A weight should be decreasing")
+        weight = object.__new__(cls)
+        weight.entries = entries
+        weight.k = k
+        weight._hash = hash(entries)
+        weight._array = None
+        weight._dual = None
+        weight._normalized = None
+        if len(_interned) >= INTERN_LIMIT:
+            _interned.popitem(last=False)
+        _interned[(k, entries)] = weight
+        return weight
+
+    @property
+    def array(self) -> np.array:
+        """
+        the entries as a read-only np.array
+        """
+        if self._array is None:
+            array = np.array(self.entries, dtype=int)
+            array.flags.writeable = False
+            self._array = array
+        return self._array
+
+    @property
+    def dual(self):
+        """
+        the dual weight (-w_k, ..., -w_1)
+        """
+        if self._dual is None:
+            self._dual = Weight(tuple(-i for i in reversed(self.entries)), self.k)
+            self._dual._dual = self
+        return self._dual
+
+    @property
+    def twist(self) -> int:
+        """
+        the last entry, U^weight = U^normalized(twist)
+        """
+        return self.entries[-1]
+
+    @property
+    def normalized(self):
+        """
+        the twist-normalized weight, with last entry equal to 0
+        """
+        if self._normalized is None:
+            self._normalized = self.shift(-self.entries[-1])
+        return self._normalized
+
+    def shift(self, twist: int):
+        """
+        the weight of U^weight(twist)
+        """
+        return Weight(tuple(i + twist for i in self.entries), self.k)
+
+    def __len__(self) -> int:
+        return self.k
+
+    def __getitem__(self, index):
+        return self.entries[index]
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __array__(self, dtype=None, copy=None):
+        return np.array(self.entries, dtype=int if dtype is None else dtype)
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __eq__(self, other) -> bool:
+        if type(other) is Weight:
+            return self is other or self.entries == other.entries
+        if isinstance(other, tuple):
+            return self.entries == other
+        return NotImplemented
+
+    def __ne__(self, other) -> bool:
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __lt__(self, other) -> bool:
+        return self.entries < _entries(other)
+
+    def __le__(self, other) -> bool:
+        return self.entries <= _entries(other)
+
+    def __gt__(self, other) -> bool:
+        return self.entries > _entries(other)
+
+    def __ge__(self, other) -> bool:
+        return self.entries >= _entries(other)
+
+    def __reduce__(self):
+        return (Weight, (self.entries, self.k))
+
+    def __str__(self) -> str:
+        return str(self.entries)
+
+    def __repr__(self) -> str:
+        return f"Weight({self.entries})"
+
+def _entries(other) -> tuple:
+    return other.entries if type(other) is Weight else tuple(other)
@@ -0,0 +1,44 @@
+import pytest
+
+from src.complex import staircase, complex_entry, _shortest_Tor_memo, _complex_key
+
+def splits(k: int, n: int) -> list:
+    return [staircase([n-1-j, 0, -j], k, 2*n+1).stupid_truncation(n-j) for j in range(3)]
+
+def test_shortest_Tor_memo_returns_copies():
+    _shortest_Tor_memo.clear()
+    split40, split31, _ = splits(3, 5)
+    first = split40.shortest_Tor(split31.dual(), 3, 5)
+    expected = _complex_key(first)
+    first.degrees[100] = complex_entry({(0, 0, 0): 1})
+    for entry in list(first.degrees.values()):
+        entry.summands.clear()
+    second = split40.shortest_Tor(split31.dual(), 3, 5)
+    assert second is not first
+    assert _complex_key(second) == expected
+
+def test_staircase_rejects_non_decreasing_weights():
+    with pytest.raises(Exception):
+        staircase([0, 1, -2], 3, 11)
+
+def notebook_complexes() -> dict:
+    """
+    G2 and G = cone(cone(G0 -> G1) -> G2) of the notebook, on IGr(3,11)
+    """
+    g2 = staircase([5,2,0], 3, 11).stupid_truncation(6)
+    g1 = staircase([4,1,0], 3, 11).stupid_truncation(5)
+    g0 = staircase([3,0,0], 3, 11).stupid_truncation(4)
+    return {"g2": g2, "g": g0.cone(g1.cone(g2))}
+
+def test_indep_matrix_matches_is_indep():
+    B = [[0,0,-3],[0,0,-2],[0,0,-1],[0,0,0],[1,0,-2],[1,0,-1],[1,0,0],[2,0,-2],[2,0,-1],[2,0,0],[3,0,-1],[3,0,0],[4,0,0]]
+    twists = list(range(2*5+1-3, -1, -1))
+    verdicts = set()
+    for cpx in notebook_complexes().values():
+        indep = cpx.indep_matrix(B, twists, 3, 5)
+        for row, weight in enumerate(B):
+            for column, twist in enumerate(twists):
+                expected = cpx.is_indep([[entry + twist for entry in weight]], 3, 5)
+                assert indep[row, column] == expected, (weight, twist)
+                verdicts.add(expected)
+    assert verdicts == {True, False}
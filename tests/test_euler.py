@@ -0,0 +1,33 @@
+import itertools
+
+from src.euler import eulerOddGrass_batch, euler_pairing_twists, Euler_precheck
+from src.vanishing_odd import vanishingOddGrass, extOddGrass_twists, is_Lefschetz_basis
+
+k, n = 3, 5
+B1 = [[0,0,-3],[0,0,-2],[0,0,-1],[0,0,0],[1,0,-2],[1,0,-1],[1,0,0],[2,0,-2],[2,0,-1],[2,0,0],[3,0,-1],[3,0,0]]
+B2 = [[0,0,-2],[0,0,-1],[0,0,0],[1,0,-2],[1,0,-1],[1,0,0],[2,0,-2],[2,0,-1],[2,0,0],[3,0,-1],[3,0,0],[4,0,0]]
+B = B1 + [[4,0,0]]
+
+def test_euler_vanishes_on_acyclic_weights():
+    weights = list(itertools.combinations_with_replacement(range(6, -7, -1), k))
+    chi = eulerOddGrass_batch(weights, k, n)
+    acyclic = [vanishingOddGrass(weight, k, n)[0] for weight in weights]
+    assert any(acyclic) and not all(acyclic)
+    assert all(chi[i] == 0 for i in range(len(weights)) if acyclic[i])
+
+def test_euler_pairing_agrees_with_Ext():
+    for U_alpha, U_beta in itertools.product(B, repeat=2):
+        profile, nonvanish = extOddGrass_twists(U_alpha, U_beta, k, n)
+        pairing = euler_pairing_twists(U_alpha, U_beta, k, n)
+        for l, vanish in profile.items():
+            if vanish:
+                assert pairing[l] == 0, (U_alpha, U_beta, l)
+        if U_alpha == U_beta:
+            # U_alpha is exceptional: Ext(U_alpha, U_alpha) is one-dimensional in degree 0
+            assert pairing[0] == 1
+
+def test_precheck_accepts_the_notebook_bases():
+    # B1 and B2 are the Lefschetz bases of the notebook, B is not
+    assert [is_Lefschetz_basis(basis, k, n) for basis in (B1, B2, B)] == [True, True, False]
+    assert Euler_precheck(B1, k, n)[0] and Euler_precheck(B2, k, n)[0]
+    assert not Euler_precheck([[0,0,0],[0,0,0]], k, n)[0]
@@ -0,0 +1,51 @@
+import random
+from collections import defaultdict
+
+import pytest
+
+from src.fullness import SymplecticRule, apply_wedge, apply_wedge_naive
+
+k = 3
+
+def random_generated(rng: random.Random, n: int) -> defaultdict:
+    """
+    random twists on a random subset of the shapes (i,-j), i+j <= w+1: most twists of a common set, 
+    so that the symplectic rule has something to add, and some other twists
+    """
+    w = 2*n+1-k
+    common = {twist for twist in range(w+1) if rng.random() < 0.7}
+    generated = defaultdict(set)
+    for i in range(w+2):
+        for j in range(w+2-i):
+            if rng.random() < 0.8:
+                generated[(i, -j)] = ({twist for twist in common if rng.random() < 0.97} 
+                                      | {twist for twist in range(w+1) if rng.random() < 0.3})
+    return generated
+
+def with_rule(rule: SymplecticRule, generated: dict) -> dict:
+    additions = rule.apply(generated)
+    return {shape: additions.get(shape, twists) for shape, twists in generated.items()}
+
+@pytest.mark.parametrize("n", range(4, 11))
+def test_symplectic_rule_matches_naive(n):
+    rng = random.Random(n)
+    for _ in range(10):
+        generated = random_generated(rng, n)
+        assert apply_wedge(generated, k, n) == apply_wedge_naive(generated, k, n)
+
+@pytest.mark.parametrize("n", [4, 6, 8])
+def test_symplectic_index_updates(n):
+    rng = random.Random(100 + n)
+    generated = random_generated(rng, n)
+    rule = SymplecticRule(k, n)
+    rule.add_shapes(generated.keys())
+    for _ in range(10):
+        removed = rng.sample(sorted(generated), len(generated)//5)
+        for shape in removed:
+            del generated[shape]
+        rule.remove_shapes(removed)
+        added = random_generated(rng, n)
+        for shape in rng.sample(sorted(added), len(added)//5):
+            generated.setdefault(shape, added[shape])
+        rule.add_shapes(generated.keys())
+        assert with_rule(rule, generated) == apply_wedge_naive(generated, k, n)
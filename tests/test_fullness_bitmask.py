@@ -0,0 +1,57 @@
+import random
+
+import numpy as np
+import pytest
+
+import src.fullness
+from src.fullness import fullness_test
+from src.fullness_bitmask import fullness_test_bitmask
+
+k = 3
+B = [[0,0,-3],[0,0,-2],[0,0,-1],[0,0,0],[1,0,-2],[1,0,-1],[1,0,0],[2,0,-2],[2,0,-1],[2,0,0],[3,0,-1],[3,0,0],[4,0,0]]
+Btwists = [list(np.array(b)+i) for i in range(2*5+2-k) for b in B]
+exc_coll = Btwists + [[5,2,0],[6,3,1],[7,4,2]]
+
+def test_notebook_basis():
+    assert fullness_test(Btwists, k, 5) is False
+    assert fullness_test_bitmask(Btwists, k, 5) is False
+    assert fullness_test(exc_coll, k, 5) is True
+    assert fullness_test_bitmask(exc_coll, k, 5) is True
+
+def test_notebook_leave_one_out():
+    for index in range(len(exc_coll)):
+        basis = exc_coll[:index] + exc_coll[index+1:]
+        assert fullness_test_bitmask(basis, k, 5) == fullness_test(basis, k, 5), exc_coll[index]
+
+def final_bundles(n: int) -> list:
+    """
+    the bundles U^{i,0,-j}(l), i+j <= 2n+1-k, l = 0,...,2n+1-k of the set T
+    """
+    w = 2*n+1-k
+    return [[i+l, l, l-j] for l in range(w+1) for i in range(w+1) for j in range(w+1-i)]
+
+@pytest.mark.parametrize("n", [4, 5, 6])
+def test_random_subsets(n):
+    rng = random.Random(n)
+    bundles = final_bundles(n)
+    verdicts = set()
+    for _ in range(12):
+        # large subsets of T, so that both verdicts occur
+        basis = rng.sample(bundles, rng.randint(len(bundles)*85//100, len(bundles)*97//100))
+        expected = fullness_test(basis, k, n)
+        assert fullness_test_bitmask(basis, k, n) == expected
+        verdicts.add(expected)
+    assert verdicts == {True, False}
+
+def test_bounded_staircase_memo(monkeypatch):
+    monkeypatch.setattr(src.fullness, "STAIRCASES_MEMO_SIZE", 4)
+    src.fullness._staircases.clear()
+    assert fullness_test_bitmask(exc_coll, k, 5) is True
+    assert len(src.fullness._staircases) == 4
+    src.fullness._staircases.clear()
+
+def test_other_ranks_are_rejected():
+    with pytest.raises(Exception):
+        fullness_test_bitmask([[0,0,0,0]], 4, 5)
+    with pytest.raises(Exception):
+        fullness_test([[0,0,0,0]], 4, 5)
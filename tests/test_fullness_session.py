@@ -0,0 +1,76 @@
+import random
+
+import pytest
+
+from src.fullness_bitmask import BitmaskFullness, FullnessSession
+from tests.test_fullness_bitmask import k, Btwists, exc_coll, final_bundles
+
+def generated_masks(state: BitmaskFullness) -> dict:
+    return {shape: mask for shape, mask in state.masks.items() if mask != 0}
+
+def check_fresh(session: FullnessSession, basis: list):
+    """
+    the session gives the same bitmasks as a fresh BitmaskFullness on the same basis
+    """
+    fresh = BitmaskFullness(basis, k, session.n)
+    fresh.run()
+    assert generated_masks(session) == generated_masks(fresh)
+    assert session.is_full() == fresh.is_full()
+    assert len(session.derivations) == sum(bin(mask).count("1") for mask in session.masks.values())
+
+def check_derivations(session: FullnessSession):
+    """
+    every derivation names a rule of the session whose premises are generated bundles
+    """
+    for (shape, twist), (rule, premises) in session.derivations.items():
+        assert session.masks[shape] >> twist & 1
+        for premise_shape, premise_twist in premises:
+            assert (premise_shape, premise_twist) in session.derivations
+            assert (shape, twist) in session.dependents[(premise_shape, premise_twist)]
+        if rule[0] == "basis":
+            assert (shape, twist) in session.basis and premises == frozenset()
+        elif rule[0] == "staircase":
+            t, offset, g = rule[1:]
+            assert session.staircases[t] is not None
+            assert twist == g + offset
+            assert shape in session._staircase_targets(t)
+            assert premises == frozenset((element, g + o) for element, o in session.staircases[t])
+        else:
+            assert rule[0] == "symplectic"
+            assert rule[1] == session.column(shape) and rule[1] in session.symplectic.columns
+            assert all(session.column(premise) <= rule[1] for premise, _ in premises)
+    steps = session.certificate()
+    position = {tuple(step["bundle"]): index for index, step in enumerate(steps)}
+    for index, step in enumerate(steps):
+        assert all(position[tuple(premise)] < index for premise in step["premises"])
+
+def test_notebook_session():
+    extra = [[5,2,0],[6,3,1],[7,4,2]]
+    session = FullnessSession(Btwists, k, 5)
+    assert session.is_full() is False
+    check_fresh(session, Btwists)
+    assert session.add(extra) is True
+    check_fresh(session, exc_coll)
+    check_derivations(session)
+    assert session.remove(extra) is False
+    check_fresh(session, Btwists)
+    check_derivations(session)
+
+@pytest.mark.parametrize("n", [4, 5])
+def test_random_add_remove(n):
+    rng = random.Random(n)
+    bundles = final_bundles(n)
+    for _ in range(5):
+        basis = [bundle for bundle in bundles if rng.random() < 0.6]
+        session = FullnessSession(basis, k, n)
+        for _ in range(6):
+            if rng.random() < 0.5 and basis:
+                removed = rng.sample(basis, rng.randint(1, min(len(basis), 10)))
+                basis = [bundle for bundle in basis if bundle not in removed]
+                session.remove(removed)
+            else:
+                added = rng.sample(bundles, rng.randint(1, 10))
+                basis += [bundle for bundle in added if bundle not in basis]
+                session.add(added)
+            check_fresh(session, basis)
+            check_derivations(session)
@@ -0,0 +1,32 @@
+import src.complex
+import src.utilities
+from src.instrument import instrumented, profiling
+
+@instrumented()
+def squares(m: int):
+    for i in range(m):
+        yield i*i
+
+def test_disabled_binds_undecorated_functions():
+    assert not hasattr(src.utilities.formatting, "__wrapped__")
+    assert not hasattr(src.complex.packed_entry.__mul__, "__wrapped__")
+    with profiling():
+        assert src.utilities.formatting.__wrapped__ is not None
+        assert src.complex.packed_entry.__mul__.__wrapped__ is not None
+    assert not hasattr(src.utilities.formatting, "__wrapped__")
+    assert not hasattr(src.complex.packed_entry.__mul__, "__wrapped__")
+
+def test_generator_is_one_call():
+    with profiling() as report:
+        assert list(squares(5)) == [0, 1, 4, 9, 16]
+    assert report.stats["squares"][0] == 1
+    assert list(squares(3)) == [0, 1, 4]
+    assert report.stats["squares"][0] == 1
+
+def test_hot_paths_are_instrumented():
+    with profiling() as report:
+        entry = src.complex.packed_entry.from_entry(src.complex.complex_entry({(1,0,0): 1}))
+        entry * entry
+        src.utilities.LRfactors_batch([((1,0,0), (1,0,-1))], 3)
+    assert report.stats["packed_entry.__mul__"][0] == 1
+    assert report.stats["LRfactors_batch"][0] == 2
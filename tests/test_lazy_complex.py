@@ -0,0 +1,43 @@
+import src.lazy_complex
+from benchmarks.workloads import splits
+from src.lazy_complex import lazy, clear_lazy_nodes
+
+k, n = 3, 4
+
+def test_truncations_are_hash_consed():
+    split40, split31, split22 = splits(k, n)
+    H = lazy(split22).cone(lazy(split31).cone(lazy(split40)))
+    assert lazy(split40) is lazy(split40)
+    assert H is lazy(split22).cone(lazy(split31).cone(lazy(split40)))
+    assert H.dual().dual() is H
+
+def test_shortest_Tor_is_shared_and_copied():
+    split40, split31, _ = splits(k, n)
+    expected = str(split40.shortest_Tor(split31.dual(), k, n))
+    first = lazy(split40).shortest_Tor(lazy(split31).dual(), k, n)
+    assert str(first) == expected
+    first.degrees.clear()
+    assert len(lazy(split40)._shortest_Tor) == 1
+    assert str(lazy(split40).shortest_Tor(lazy(split31).dual(), k, n)) == expected
+
+def test_node_table_is_bounded(monkeypatch):
+    monkeypatch.setattr(src.lazy_complex, "LAZY_NODES_SIZE", 8)
+    clear_lazy_nodes()
+    node = lazy(splits(k, n)[0]).right
+    for i in range(1, 20):
+        node.shift(i)
+    assert len(src.lazy_complex._nodes) == 8
+    # evicted nodes stay valid
+    assert node.shift(1).value.degrees == node.value.shift(1).degrees
+
+def test_leaves_keep_empty_degrees():
+    from src.complex import complex, complex_entry, _complex_key
+    entry = {(1, 0, 0): 1}
+    short = complex({0: complex_entry(entry), 1: complex_entry(entry)})
+    padded = complex({0: complex_entry(entry), 1: complex_entry(entry), 2: complex_entry({})})
+    assert lazy(short) is not lazy(padded)
+    for cpx in (short, padded):
+        expected = cpx.stupid_truncation(1)
+        truncation = lazy(cpx).stupid_truncation(1).evaluate()
+        assert _complex_key(truncation.right) == _complex_key(expected.right)
+        assert _complex_key(truncation.left) == _complex_key(expected.left)
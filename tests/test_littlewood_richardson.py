@@ -0,0 +1,36 @@
+import itertools
+from fractions import Fraction
+
+import pytest
+
+from src.littlewood_richardson import mult, mult_batch, _mult_generic
+
+def partitions(bound: int, rows: int) -> list:
+    return [p for p in itertools.product(range(bound, -1, -1), repeat=rows) if list(p) == sorted(p, reverse=True)]
+
+def dimension(partition) -> int:
+    """
+    Weyl dimension formula for the irreducible representation of GL_k of highest weight partition
+    """
+    k = len(partition)
+    dim = Fraction(1)
+    for i in range(k):
+        for j in range(i+1, k):
+            dim *= Fraction(partition[i] - partition[j] + j - i, j - i)
+    return int(dim)
+
+def test_rank3_matches_generic_on_box():
+    pairs = list(itertools.product(partitions(5, 3), repeat=2))
+    assert len(pairs) == 3136
+    for (outer, inner), product in zip(pairs, mult_batch(pairs, 3)):
+        assert product == _mult_generic(list(outer), list(inner), 3), (outer, inner)
+
+@pytest.mark.parametrize("rows, bound", [(2, 6), (3, 4), (4, 3)])
+def test_dimension_identity(rows, bound):
+    for outer, inner in itertools.product(partitions(bound, rows), repeat=2):
+        product = mult(outer, inner, rows)
+        assert sum(c * dimension(nu) for nu, c in product.items()) == dimension(outer) * dimension(inner)
+
+def test_rejects_non_partitions():
+    with pytest.raises(Exception):
+        mult([0, 1, 0], [1, 0, 0], 3)
@@ -0,0 +1,39 @@
+import src.runner
+from src.runner import run, read_checkpoint
+
+B1 = [[0,0,-3],[0,0,-2],[0,0,-1],[0,0,0],[1,0,-2],[1,0,-1],[1,0,0],[2,0,-2],[2,0,-1],[2,0,0],[3,0,-1],[3,0,0]]
+
+def counting(monkeypatch) -> list:
+    calls = []
+    run_subjob = src.runner.run_subjob
+    def counted(job, sub):
+        calls.append((job["name"], sub))
+        return run_subjob(job, sub)
+    monkeypatch.setattr(src.runner, "run_subjob", counted)
+    return calls
+
+def test_checkpoint_skips_only_unchanged_jobs(tmp_path, monkeypatch):
+    checkpoint = str(tmp_path / "jobs.checkpoint")
+    calls = counting(monkeypatch)
+    jobs = {"k": 3, "n": 5, "jobs": [{"type": "lefschetz", "basis": B1}, {"type": "lefschetz", "basis": B1 + [[4,0,0]]}]}
+    first = run(jobs, checkpoint=checkpoint)
+    assert [job["ok"] for job in first["jobs"]] == [True, False]
+    assert len(calls) == 2
+    assert run(jobs, checkpoint=checkpoint) == first
+    assert len(calls) == 2
+    # reordered unnamed jobs: "job 0" and "job 1" are now different jobs
+    swapped = dict(jobs, jobs=jobs["jobs"][::-1])
+    assert [job["ok"] for job in run(swapped, checkpoint=checkpoint)["jobs"]] == [False, True]
+    assert len(calls) == 4
+    # an edited n
+    edited = dict(swapped, n=4)
+    run(edited, checkpoint=checkpoint)
+    assert len(calls) == 6
+    assert all(spec is not None for spec, _ in read_checkpoint(checkpoint).values())
+
+def test_max_violations_only_caps_the_list():
+    jobs = {"k": 3, "n": 5, "jobs": [{"type": "lefschetz", "basis": B1 + [[4,0,0]], "max_violations": cap}
+                                     for cap in (0, 1)]}
+    results = run(jobs)["jobs"]
+    assert [job["ok"] for job in results] == [False, False]
+    assert [len(job["results"]["lefschetz"]["violations"]) for job in results] == [0, 1]
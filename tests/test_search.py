@@ -0,0 +1,25 @@
+from src.search import LefschetzSearch, canonical_form, dual_permutation, _search_branch
+
+k, n = 3, 4
+# closed under duality: U^{a,b,c} -> U^{-c,-b,-a}
+pool = [[a,b,c] for a in range(-2,3) for b in range(-2,3) for c in range(-2,3) if a>=b>=c and a-c<=3]
+
+def classes(branches: list, candidates: list) -> set:
+    return {canonical_form([candidates[i] for i in indices], k) for branch in branches for indices in branch}
+
+def test_dual_permutation():
+    dual = dual_permutation(pool, k)
+    assert dual is not None
+    assert all(dual[dual[i]] == i for i in range(len(pool)))
+    assert all(pool[dual[i]] == [-c, -b, -a] for i, (a, b, c) in enumerate(pool))
+    assert dual_permutation(pool + [[3,0,0]], k) is None
+
+def test_pruned_branches_keep_every_class():
+    search = LefschetzSearch(pool, k, n, min_size=6)
+    exceptional, precedes = search.graph()
+    dual = dual_permutation(search.candidates, k)
+    full = [_search_branch(first, exceptional, precedes, 6) for first in range(len(pool))]
+    pruned = [_search_branch(first, exceptional, precedes, 6, dual) for first in range(len(pool))]
+    assert sum(map(len, pruned)) < sum(map(len, full))
+    assert classes(pruned, search.candidates) == classes(full, search.candidates)
+    assert len(search.collections()) == len(classes(full, search.candidates))
@@ -0,0 +1,73 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+import src.utilities
+from src.utilities import LRcache, LRfactors, configure_LR_cache
+
+def product(cache: LRcache, alpha: tuple, beta: tuple):
+    key = cache.key(alpha, beta, 3)
+    factors = cache.get(key)
+    if factors is None:
+        factors = cache.put(key, src.utilities._LR_mult(list(alpha), list(beta), 3))
+    return factors
+
+def test_lru_eviction_and_resize():
+    cache = LRcache(maxsize=2)
+    keys = [cache.key(alpha, (1, 0, 0), 3) for alpha in [(1, 0, 0), (2, 0, 0), (2, 1, 0)]]
+    for key in keys[:2]:
+        cache.put(key, {(1, 0, 0): 1})
+    assert cache.get(keys[0]) is not None
+    cache.put(keys[2], {(1, 0, 0): 1})
+    # keys[1] is the least recently used
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None and cache.get(keys[2]) is not None
+    cache.resize(1)
+    assert cache.info()["size"] == 1 and cache.get(keys[2]) is not None
+    assert cache.key((1, 0, 0), (2, 0, 0), 3) == cache.key((2, 0, 0), (1, 0, 0), 3)
+
+def test_sqlite_round_trip(tmp_path):
+    path = str(tmp_path / "lr.sqlite")
+    cache = LRcache(path=path)
+    expected = product(cache, (2, 1, 0), (1, 1, 0))
+    assert cache.misses == 1
+    cache.flush()
+    cache.close()
+    reopened = LRcache(path=path)
+    assert product(reopened, (1, 1, 0), (2, 1, 0)) == expected
+    assert reopened.info()["disk_hits"] == 1 and reopened.misses == 0
+    reopened.close()
+
+def test_LRfactors_with_configured_cache(tmp_path):
+    saved = src.utilities.LR_cache
+    src.utilities.LR_cache = LRcache()
+    try:
+        configure_LR_cache(maxsize=8, path=str(tmp_path / "lr.sqlite"))
+        first = LRfactors([2, 1, -1], [1, 0, 0], 3)
+        src.utilities.LR_cache.clear()
+        assert LRfactors([2, 1, -1], [1, 0, 0], 3) == first
+        assert src.utilities.LR_cache.info()["disk_hits"] == 1
+        src.utilities.LR_cache.close()
+    finally:
+        src.utilities.LR_cache = saved
+
+def _forked_product() -> tuple:
+    factors = product(forked_cache, (3, 1, 0), (2, 0, 0))
+    return os.getpid(), forked_cache._pid, factors, forked_cache.disk_hits
+
+@pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason="needs fork")
+def test_forked_workers_open_their_own_connection(tmp_path):
+    global forked_cache
+    forked_cache = LRcache(path=str(tmp_path / "lr.sqlite"))
+    expected = product(forked_cache, (3, 1, 0), (2, 0, 0))
+    forked_cache.flush()
+    forked_cache.clear()
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("fork")) as executor:
+        pid, connection_pid, factors, disk_hits = executor.submit(_forked_product).result()
+    assert pid != os.getpid() and connection_pid == pid
+    assert factors == expected and disk_hits == 1
+    # the connection of the parent is still usable
+    assert product(forked_cache, (3, 1, 0), (2, 0, 0)) == expected
+    forked_cache.close()
@@ -0,0 +1,84 @@
+import itertools
+from collections import Counter
+
+import numpy as np
+import pytest
+
+import src.vanishing_odd
+from src.utilities import LRfactors
+from src.vanishing_odd import ExtCache, canonical_Ext_pair, extOddGrass_batch, extOddGrass, extOddGrass_twists, iter_Lefschetz_violations
+from src.vanishing_odd import VanishingIndex, vanishingOddGrass, vanishingOddGrass_batch, vanishingEvenGrass, _wedge_resolution
+
+k, n = 3, 3
+
+def dominant_weights(bound: int, k: int = k) -> list:
+    return list(itertools.combinations_with_replacement(range(bound, -bound-1, -1), k))
+
+@pytest.mark.parametrize("rank", [2, 3, 4])
+def test_wedge_resolution_matches_LRfactors(rank):
+    weights = dominant_weights(3, rank)
+    owners, positions, products = _wedge_resolution(weights, rank)
+    terms = Counter(zip(owners.tolist(), positions.tolist(), map(tuple, products.tolist())))
+    expected = Counter()
+    for owner, weight in enumerate(weights):
+        for i in range(rank+1):
+            for term, multip in LRfactors(weight, [0]*(rank-i) + [-1]*i, rank).items():
+                expected[(owner, i, term)] += multip
+    assert terms == expected
+
+def test_vanishingOddGrass_matches_LRfactors_resolution():
+    for weight in dominant_weights(4):
+        nonvanish = {}
+        for i in range(k+1):
+            terms = {term for term in LRfactors(weight, [0]*(k-i) + [-1]*i, k) if not vanishingEvenGrass(term, k, n+1)}
+            if terms:
+                nonvanish[i] = terms
+        assert vanishingOddGrass(weight, k, n) == (len(nonvanish) == 0, nonvanish)
+
+def test_vanishing_index(tmp_path, monkeypatch):
+    index = VanishingIndex(k, n, bound=3)
+    # computed without any index
+    weights = dominant_weights(5)
+    expected = [vanishingOddGrass(weight, k, n) for weight in weights]
+    index.save(str(tmp_path / "index.npz"))
+    loaded = VanishingIndex.load(str(tmp_path / "index.npz"))
+    assert np.array_equal(loaded.verdicts, index.verdicts)
+    assert loaded.nonvanish == index.nonvanish
+    monkeypatch.setitem(src.vanishing_odd.vanishing_indices, (k, n), loaded)
+    # inside the box the answers are lookups, outside they are computed
+    assert any(max(abs(i) for i in weight) > 3 for weight in weights)
+    assert [vanishingOddGrass(weight, k, n) for weight in weights] == expected
+    assert vanishingOddGrass_batch(weights, k, n).tolist() == [vanish for vanish, _ in expected]
+
+def test_Ext_results_are_copies():
+    queries = [([1,0,0], [1,0,0]), ([0,0,-1], [0,0,-1]), ([3,2,2], [3,2,2])]
+    expected = [(vanish, dict(nonvanish)) for vanish, nonvanish in (extOddGrass(*query, 3, 5) for query in queries)]
+    assert expected[0] == (False, {(0,0,0): 1})
+    extOddGrass([1,0,0], [1,0,0], 3, 5)[1][(0,0,0)] += 1
+    extOddGrass_twists([1,0,0], [1,0,0], 3, 5)[1][0][(0,0,0)] += 1
+    for violation in iter_Lefschetz_violations([[0,0,0], [0,0,0]], 3, 5):
+        violation["nonvanish"].clear()
+    # the twisted and dual queries are in the same orbit, hence share one cache entry
+    assert [extOddGrass(*query, 3, 5) for query in queries] == expected
+    assert extOddGrass([0,0,0], [0,0,0], 3, 5) == (False, Counter({(0,0,0): 1}))
+
+def test_canonical_Ext_pair():
+    weights = dominant_weights(2)
+    for alpha, beta in itertools.product(weights, repeat=2):
+        key = canonical_Ext_pair(alpha, beta, k)
+        for m in range(-3, 4):
+            assert canonical_Ext_pair([i + m for i in alpha], [i + m for i in beta], k) == key
+        # (U_beta^*, U_alpha^*)
+        assert canonical_Ext_pair([-i for i in beta[::-1]], [-i for i in alpha[::-1]], k) == key
+    assert canonical_Ext_pair([1,0,0], [1,0,0], k) != canonical_Ext_pair([1,0,0], [0,0,0], k)
+
+def test_extOddGrass_batch_matches_single_pairs(monkeypatch):
+    monkeypatch.setattr(src.vanishing_odd, "Ext_cache", ExtCache())
+    weights = dominant_weights(1)
+    pairs = list(itertools.product(weights, repeat=2))
+    batch = extOddGrass_batch(pairs, k, n)
+    assert src.vanishing_odd.Ext_cache.info()["computed"] < len(pairs)
+    for pair, result in zip(pairs, batch):
+        src.vanishing_odd.Ext_cache.clear()
+        assert extOddGrass_twists(*pair, k, n) == result
+        assert extOddGrass(*pair, k, n) == (result[0][0], result[1].get(0, Counter()))
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+import src.weight
+from src.utilities import formatting, weight_array
+from src.weight import Weight
+
+def test_formatting_returns_a_new_writable_array():
+    a = formatting([2, 1], 3)
+    a += 1
+    assert a.tolist() == [3, 2, 1]
+    assert formatting([2, 1], 3).tolist() == [2, 1, 0]
+    assert formatting([2, 1], 3) is not formatting([2, 1], 3)
+    with pytest.raises(Exception):
+        formatting([0, 1], 3)
+
+def test_weight_array_is_interned():
+    a = weight_array([2, 1], 3)
+    assert a is weight_array(np.array([2, 1, 0]), 3)
+    assert not a.flags.writeable
+
+def test_intern_table_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr(src.weight, "INTERN_LIMIT", 4)
+    monkeypatch.setattr(src.weight, "_interned", type(src.weight._interned)())
+    first = Weight((5, 0, 0))
+    for i in range(10):
+        Weight((i, 0, 0))
+        # using first keeps it in the table
+        assert Weight((5, 0, 0)) is first
+    assert len(src.weight._interned) == 4